@@ -0,0 +1,10 @@
+"""قياس أداء مترجم White
+
+corpus: توليد مستندات .white واقعية بأحجام قابلة للتحكم
+micro:  قياسات منفصلة لكل معالج أوامر
+e2e:    قياس compile_to_html و main() من البداية إلى النهاية
+
+التشغيل من جذر المستودع:
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare old.json --output new.json
+"""
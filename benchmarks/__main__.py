@@ -0,0 +1,81 @@
+"""تشغيل كل القياسات وحفظ النتائج بصيغة JSON للمقارنة بين الإصدارات"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import compiler
+from benchmarks import e2e, micro
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(old: dict, new: dict):
+    """طباعة نسبة التغير لكل قياس زمني مشترك بين ملفي نتائج"""
+    old_flat = _flatten(old['results'])
+    new_flat = _flatten(new['results'])
+    print(f"{'benchmark':55} {'old':>12} {'new':>12} {'ratio':>7}")
+    for key, new_value in new_flat.items():
+        old_value = old_flat.get(key)
+        if not old_value or not ('ns_per_call_min' in key or 'seconds' in key):
+            continue
+        print(f"{key:55} {old_value:12} {new_value:12} {new_value / old_value:7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="White compiler benchmarks")
+    parser.add_argument('--output', '-o', help="حفظ النتائج في ملف JSON")
+    parser.add_argument('--compare', metavar='OLD_JSON', help="مقارنة النتائج بملف نتائج سابق")
+    parser.add_argument('--quick', action='store_true', help="أحجام أصغر لتشغيل سريع")
+    parser.add_argument('--only', choices=['micro', 'e2e'], help="تشغيل مجموعة واحدة فقط")
+    args = parser.parse_args(argv)
+    
+    results = {}
+    if args.only in (None, 'micro'):
+        results['micro'] = micro.run(number=500 if args.quick else 2000)
+    if args.only in (None, 'e2e'):
+        results['e2e'] = e2e.run(quick=args.quick)
+    
+    report = {
+        'commit': _git_commit(),
+        'compiler_version': compiler.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(json.load(file), report)
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
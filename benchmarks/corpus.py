@@ -0,0 +1,110 @@
+"""توليد مستندات .white اصطناعية تغطي كل أوامر parse_line"""
+import os
+import random
+
+ARABIC_WORDS = [
+    'مرحبا', 'بكم', 'في', 'موقعنا', 'الجديد', 'هذا', 'نص', 'تجريبي', 'للغة',
+    'وايت', 'الصفحة', 'الرئيسية', 'خدمات', 'تواصل', 'معنا', 'منتجات', 'عروض',
+]
+LATIN_WORDS = [
+    'hello', 'world', 'white', 'language', 'compiler', 'fast', 'page', 'site',
+    'report', 'table', 'value', 'total', 'service', 'contact', 'product',
+]
+COLORS = ['primary', 'secondary', 'success', 'danger', 'dark', 'light', 'red', '#333', 'rgb(1,2,3)']
+
+
+def _words(rng: random.Random, count: int, rtl: bool) -> str:
+    vocabulary = ARABIC_WORDS if rtl else LATIN_WORDS
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+
+def _style(rng: random.Random) -> str:
+    choices = [
+        f"color:{rng.choice(COLORS)}",
+        f"size:{rng.randint(12, 40)}",
+        f"bg:{rng.choice(COLORS)}",
+        f"padding:{rng.randint(0, 30)}",
+        f"margin:{rng.choice(['auto', 'center', '10'])}",
+        f"radius:{rng.randint(0, 20)}",
+        f"weight:{rng.choice(['bold', '600'])}",
+        f"align:{rng.choice(['right', 'center'])}",
+        "shadow:0.2",
+    ]
+    return ' '.join(rng.sample(choices, rng.randint(0, 3)))
+
+
+def _block(rng: random.Random, rtl: bool) -> list:
+    """كتلة واحدة من الأسطر تبدأ بأمر يُختار عشوائياً"""
+    kind = rng.choice([
+        'title', 'header', 'print', 'paragraph', 'paragraph', 'text', 'button', 'link',
+        'list', 'code', 'div', 'image', 'span', 'concat', 'var', 'table', 'form', 'rule',
+    ])
+    text = _words(rng, rng.randint(2, 12), rtl)
+    
+    if kind == 'text':
+        return [f"{text} {{name}}"]
+    if kind == 'button':
+        return [f'button "{_words(rng, 2, rtl)}" {_style(rng)}']
+    if kind == 'link':
+        return [f'link "{_words(rng, 2, rtl)}" to "https://example.com/{rng.randint(1, 99)}" {_style(rng)}']
+    if kind == 'list':
+        items = ', '.join(f'"{_words(rng, 2, rtl)}"' for _ in range(rng.randint(2, 6)))
+        return [f'list {items} {_style(rng)}']
+    if kind == 'code':
+        return [f'code "def f(x):\\n    return x * {rng.randint(1, 9)}" bg:dark']
+    if kind == 'image':
+        return [f'image "img/photo{rng.randint(1, 20)}.png" alt:"{_words(rng, 2, rtl)}" width:{rng.randint(100, 600)} radius:8']
+    if kind == 'span':
+        return [f"span '{_words(rng, 2, rtl)}' color:{rng.choice(COLORS)} class:note"]
+    if kind == 'concat':
+        parts = [f'"{_words(rng, 2, rtl)} "']
+        for _ in range(rng.randint(1, 4)):
+            parts.append(f'span "{_words(rng, 1, rtl)}" color:{rng.choice(COLORS)} weight:bold')
+            parts.append(f'" {{name}} "')
+        return [' + '.join(parts)]
+    if kind == 'var':
+        return [f'var name = "{_words(rng, 1, rtl)}"']
+    if kind == 'table':
+        headers = ', '.join(f'"{_words(rng, 1, rtl)}"' for _ in range(3))
+        lines = [f'table headers:[{headers}]']
+        for _ in range(rng.randint(2, 20)):
+            lines.append(f'tablerow "{_words(rng, 1, rtl)}", {rng.randint(1, 999)}, \'{_words(rng, 2, rtl)}\'')
+        lines.append('endtable')
+        return lines
+    if kind == 'form':
+        return [
+            f'form action:"/submit" method:POST name:f{rng.randint(1, 9)} {_style(rng)}',
+            f'input "{_words(rng, 1, rtl)}" type:text name:user required',
+            f'select "{_words(rng, 1, rtl)}" name:choice options:["a", "b", \'c, d\']',
+            f'textarea "{_words(rng, 1, rtl)}" name:msg rows:5',
+            'button "Send" type:submit',
+            'endform',
+        ]
+    if kind == 'rule':
+        return [rng.choice(['br', 'hr', '// comment', '# comment', ''])]
+    return [f'{kind} "{text}" {_style(rng)}']
+
+
+def generate_document(lines: int = 200, seed: int = 0, rtl_ratio: float = 0.5) -> str:
+    """توليد مستند .white بعدد أسطر تقريبي؛ rtl_ratio نسبة الكتل العربية"""
+    rng = random.Random(seed)
+    output = [
+        f'meta title = "{_words(rng, 3, True)}"',
+        f'meta description = "{_words(rng, 6, False)}"',
+        'var name = "وايت"',
+    ]
+    while len(output) < lines:
+        output.extend(_block(rng, rng.random() < rtl_ratio))
+    return '\n'.join(output) + '\n'
+
+
+def write_corpus(directory: str, files: int = 100, lines: int = 200, seed: int = 0) -> list:
+    """كتابة مجموعة ملفات .white في مجلد وإرجاع مساراتها"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"page{index:05d}.white")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(generate_document(lines, seed + index))
+        paths.append(path)
+    return paths
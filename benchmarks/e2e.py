@@ -0,0 +1,63 @@
+"""قياس compile_to_html و main() من البداية إلى النهاية"""
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import compiler
+from benchmarks.corpus import generate_document, write_corpus
+
+
+def bench_compile_to_html(lines: int = 2000, repeat: int = 5) -> dict:
+    """إنتاجية compile_to_html على مستند واحد"""
+    source = generate_document(lines, seed=1)
+    samples = []
+    for _ in range(repeat):
+        white = compiler.WhiteCompiler()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            white.compile_to_html(source)
+            samples.append(time.perf_counter() - started)
+    
+    best = min(samples)
+    return {
+        'lines': source.count('\n'),
+        'bytes': len(source.encode('utf-8')),
+        'seconds_min': round(best, 6),
+        'lines_per_second': round(source.count('\n') / best),
+    }
+
+
+def bench_main(files: int = 200, lines: int = 200, jobs: int = 1) -> dict:
+    """زمن بناء مجلد كامل عبر main()، مرة كاملة ومرة بلا تغييرات"""
+    directory = tempfile.mkdtemp(prefix='white-bench-')
+    try:
+        write_corpus(directory, files, lines)
+        argv = [directory, '--jobs', str(jobs)]
+        
+        timings = {}
+        for label, extra in (('full_build', ['--force']), ('noop_rebuild', [])):
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                compiler.main(argv + extra)
+                timings[f'{label}_seconds'] = round(time.perf_counter() - started, 4)
+        
+        timings.update({'files': files, 'lines_per_file': lines, 'jobs': jobs})
+        timings['files_per_second'] = round(files / timings['full_build_seconds'])
+        return timings
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(quick: bool = False) -> dict:
+    scale = 5 if quick else 1
+    results = {
+        'compile_to_html': bench_compile_to_html(lines=2000 // scale),
+        'main_serial': bench_main(files=200 // scale),
+    }
+    cpus = os.cpu_count() or 1
+    if cpus > 1:
+        results['main_parallel'] = bench_main(files=200 // scale, jobs=cpus)
+    return results
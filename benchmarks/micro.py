@@ -0,0 +1,119 @@
+"""قياسات منفصلة لكل معالج أوامر في WhiteCompiler"""
+import statistics
+import time
+
+from compiler import WhiteCompiler
+
+# اسم القياس -> (دالة التحليل في WhiteCompiler، السطر المُمرر لها)
+# يقيس كل استدعاء مرحلتي التحليل والإخراج للسطر
+HANDLER_CASES = {
+    'print': ('_parse_text_block', 'print "Hello {name}, welcome back" color:primary size:18'),
+    'title': ('_parse_text_block', 'title "مرحبا بكم في {name}" color:dark size:32 align:center'),
+    'header': ('_parse_text_block', 'header "Section title" bg:light padding:10'),
+    'paragraph': ('_parse_text_block', 'paragraph "Plain paragraph text with no styles at all"'),
+    'button': ('_parse_button', 'button "Send" color:white bg:success type:submit'),
+    'link': ('_parse_link', 'link "Docs" to "https://example.com/docs" color:blue'),
+    'list': ('_parse_list', 'list "one", "two", "three", "four" color:dark'),
+    'code': ('_parse_code', 'code "def f(x):\\n    return x" bg:dark'),
+    'div': ('_parse_text_block', 'div "box" border:primary width:300 shadow:0.3'),
+    'image': ('_parse_image', 'image "img/photo.png" alt:"صورة" width:200 radius:10'),
+    'span': ('_parse_span', "span 'note' color:red class:big"),
+    'var': ('_parse_var', 'var name = "وايت"'),
+    'table': ('_parse_table', 'table headers:["Name", "Age", \'City, Country\']'),
+    'tablerow': ('_parse_tablerow', 'tablerow "Ali", 30, \'Cairo, Egypt\''),
+    'form': ('_parse_form', 'form action:"/submit" method:POST name:contact bg:light'),
+    'input': ('_parse_input', 'input "Name" type:text name:username required'),
+    'select': ('_parse_select', 'select "Country" name:country options:["Egypt", "UAE", \'KSA\']'),
+    'textarea': ('_parse_textarea', 'textarea "Message" name:msg rows:6'),
+    'span_concatenation': ('_parse_span_concatenation',
+                           '"Hello " + span "World" color:primary weight:bold + " and {name}"'),
+    'parse_line_text': ('parse_line', 'just a plain text line mentioning {name} twice {name}'),
+    'parse_line_dispatch': ('parse_line', 'paragraph "dispatched through parse_line"'),
+}
+
+
+def time_call(func, arg, number: int, repeat: int = 5) -> dict:
+    """تشغيل func(arg) عدة مرات وإرجاع زمن الاستدعاء الواحد بالنانوثانية"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        samples.append((time.perf_counter() - started) / number * 1e9)
+    return {
+        'ns_per_call_min': round(min(samples), 1),
+        'ns_per_call_median': round(statistics.median(samples), 1),
+        'calls': number * repeat,
+    }
+
+
+def _fresh_compiler() -> WhiteCompiler:
+    compiler = WhiteCompiler()
+    compiler.variable_manager.set_variable('name', 'وايت')
+    return compiler
+
+
+def _handler(compiler: WhiteCompiler, method: str):
+    """دالة تحلل السطر بالمعالج المحدد ثم تخرج العقدة الناتجة"""
+    parse = getattr(compiler, method)
+    if method == 'parse_line':
+        return parse
+    
+    def parse_and_render(line):
+        node = parse(line)
+        return compiler._render_node(node) if node else ""
+    return parse_and_render
+
+
+def span_line(segments: int) -> str:
+    """سطر دمج طويل يتناوب فيه النص و span بخصائص"""
+    pieces = []
+    for i in range(segments):
+        if i % 2:
+            pieces.append(f'span "word{i}" color:primary weight:bold')
+        else:
+            pieces.append(f'"text {i} {{name}}"')
+    return ' + '.join(pieces)
+
+
+def span_throughput(segments: int = 10000, repeat: int = 3) -> dict:
+    """سرعة _parse_span_concatenation على سطر واحد من segments جزء"""
+    compiler = _fresh_compiler()
+    line = span_line(segments)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compiler._parse_span_concatenation(line)
+        samples.append(time.perf_counter() - started)
+    seconds = min(samples)
+    return {
+        'segments': segments,
+        'line_bytes': len(line.encode('utf-8')),
+        'seconds': round(seconds, 6),
+        'segments_per_second': round(segments / seconds),
+    }
+
+
+def run(number: int = 2000, cases=None) -> dict:
+    """تشغيل القياسات المختارة وإرجاع النتائج مفهرسة باسم القياس"""
+    results = {}
+    for name, (method, line) in HANDLER_CASES.items():
+        if cases and name not in cases:
+            continue
+        compiler = _fresh_compiler()
+        results[name] = time_call(_handler(compiler, method), line, number)
+    
+    style_manager = _fresh_compiler().style_manager
+    results['parse_style_attributes'] = time_call(
+        style_manager.parse_style_attributes, 'Hello world color:primary size:32 bg:light weight:bold', number)
+    results['generate_css_class'] = time_call(
+        style_manager.generate_css_class, {'color': 'primary', 'size': '32', 'bg': 'light'}, number)
+    
+    variable_manager = _fresh_compiler().variable_manager
+    results['replace_variables'] = time_call(
+        variable_manager.replace_variables, 'Hello {name}, you have {count} new {name} messages', number)
+    
+    if not cases or 'span_concatenation' in cases:
+        results['span_concatenation_10k'] = span_throughput(10000)
+    
+    return results
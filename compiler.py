@@ -1,11 +1,58 @@
 import re
 import os
+import posixpath
 import sys
-import glob
+import io
+import fnmatch
+import time
+import csv
+import gzip
+import filecmp
+import html
+import json
+import marshal
+import struct
+import hashlib
+import shutil
+import argparse
+import heapq
+import threading
+import contextlib
+import itertools
+import urllib.parse
+from collections import OrderedDict
 from pathlib import Path
 
+__version__ = "1.0.0"
+
+def _compiler_fingerprint() -> str:
+    """بصمة كود المترجم نفسه، فأي تعديل عليه يبطل السجلات والذاكرات المحفوظة
+    
+    __version__ لا يتغير مع كل تعديل، لذا لا يكفي وحده لمعرفة أن الناتج قد يختلف.
+    """
+    try:
+        with open(__file__, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()[:16]
+    except OSError:
+        return __version__
+
+COMPILER_FINGERPRINT = _compiler_fingerprint()
+
+# إصدار صيغة IR المحفوظة؛ يُرفع عند تغيير شكل العقد
+IR_VERSION = 1
+
+# خصائص الأنماط المدعومة بترتيب تحويلها إلى CSS
+STYLE_ATTRIBUTES = (
+    'color', 'size', 'bg', 'width', 'height', 'margin', 'padding',
+    'border', 'font', 'align', 'radius', 'weight', 'shadow', 'opacity',
+)
+_STYLE_ATTR_RE = re.compile(r'(' + '|'.join(STYLE_ATTRIBUTES) + r'):([^;\s]+)')
+
 class StyleManager:
     """إدارة الأنماط والألوان"""
+    # الحد الأقصى لذاكرة تحويل (attr, value) -> css
+    CSS_CACHE_SIZE = 4096
+    
     def __init__(self):
         self.theme_colors = {
             'primary': '#3498db',
@@ -28,38 +75,35 @@ class StyleManager:
             'orange': '#fd7e14'
         }
         self.custom_styles = {}
-        self.class_counter = 0
+        self._css_cache = {}
+
+    def fork(self):
+        """نسخة لمستند جديد تشارك الألوان وذاكرة التحويل وتبدأ بأنماط فارغة"""
+        clone = StyleManager.__new__(StyleManager)
+        clone.theme_colors = self.theme_colors
+        clone._css_cache = self._css_cache
+        clone.custom_styles = {}
+        return clone
 
     def parse_style_attributes(self, content: str):
         """تحليل خصائص الأنماط من النص"""
-        style_attrs = {}
-        text_content = content
-        
-        patterns = {
-            'color': r'color:([^;\s]+)',
-            'size': r'size:([^;\s]+)', 
-            'bg': r'bg:([^;\s]+)',
-            'width': r'width:([^;\s]+)',
-            'height': r'height:([^;\s]+)',
-            'margin': r'margin:([^;\s]+)',
-            'padding': r'padding:([^;\s]+)',
-            'border': r'border:([^;\s]+)',
-            'font': r'font:([^;\s]+)',
-            'align': r'align:([^;\s]+)',
-            'radius': r'radius:([^;\s]+)',
-            'weight': r'weight:([^;\s]+)',
-            'shadow': r'shadow:([^;\s]+)',
-            'opacity': r'opacity:([^;\s]+)'
-        }
+        if ':' not in content:
+            return ' '.join(content.split()), {}
+        
+        # مسح واحد يستخرج كل أزواج key:value ويحذفها من النص
+        found = {}
+        
+        def collect(match):
+            found.setdefault(match.group(1), match.group(2))
+            return ''
+        
+        text_content = _STYLE_ATTR_RE.sub(collect, content)
         
-        for attr, pattern in patterns.items():
-            match = re.search(pattern, content)
-            if match:
-                value = match.group(1).strip()
-                if value:
-                    style_attrs[attr] = value
-                    # إزالة النمط من النص
-                    text_content = re.sub(pattern, '', text_content)
+        # الحفاظ على الترتيب الثابت للخصائص كما في STYLE_ATTRIBUTES
+        if len(found) > 1:
+            style_attrs = {attr: found[attr] for attr in STYLE_ATTRIBUTES if attr in found}
+        else:
+            style_attrs = found
         
         text_content = ' '.join(text_content.split())
         return text_content, style_attrs
@@ -69,10 +113,6 @@ class StyleManager:
         if not style_attrs:
             return ""
         
-        # إنشاء class جديد
-        self.class_counter += 1
-        class_name = f"ws{self.class_counter}"
-        
         # تحويل الأنماط إلى CSS
         css_rules = []
         for attr, value in style_attrs.items():
@@ -80,13 +120,32 @@ class StyleManager:
             if css_rule:
                 css_rules.append(css_rule)
         
-        if css_rules:
-            self.custom_styles[f".{class_name}"] = "; ".join(css_rules)
-            return f' class="{class_name}"'
+        if not css_rules:
+            return ""
         
-        return ""
+        # اسم الـ class مشتق من محتوى القواعد: الأنماط المتطابقة تشترك في class واحد
+        # ويبقى الاسم ثابتاً بين عمليات البناء
+        rules = "; ".join(css_rules)
+        digest = hashlib.sha1(rules.encode('utf-8')).hexdigest()
+        length = 8
+        while self.custom_styles.get(f".ws{digest[:length]}", rules) != rules:
+            length += 2
+        class_name = f"ws{digest[:length]}"
+        
+        self.custom_styles[f".{class_name}"] = rules
+        return f' class="{class_name}"'
 
     def _convert_to_css(self, attr: str, value: str) -> str:
+        """تحويل خاصية إلى CSS مع حفظ النتيجة لإعادة استخدامها"""
+        key = (attr, value)
+        css_rule = self._css_cache.get(key)
+        if css_rule is None:
+            if len(self._css_cache) >= self.CSS_CACHE_SIZE:
+                self._css_cache.clear()
+            css_rule = self._css_cache[key] = self._build_css_rule(attr, value)
+        return css_rule
+
+    def _build_css_rule(self, attr: str, value: str) -> str:
         """تحويل خصائص White إلى CSS مع دعم جميع الألوان"""
         if not value:
             return ""
@@ -154,6 +213,8 @@ class TableManager:
     def __init__(self):
         self.current_table = None
         self.table_counter = 0
+        # في وضع البث تُكتب الصفوف فور وصولها بدلاً من تجميعها حتى endtable
+        self.streaming = False
 
     def start_table(self, headers: list = None, style_attrs: dict = None):
         """بدء جدول جديد"""
@@ -164,19 +225,58 @@ class TableManager:
             'id': table_id,
             'headers': headers or [],
             'rows': [],
+            'row_count': 0,
             'style_attrs': style_attrs or {}
         }
 
-    def add_table_row(self, cells: list):
-        """إضافة صف للجدول"""
-        if self.current_table:
+    def add_table_row(self, cells: list) -> str:
+        """إضافة صف للجدول، وإرجاع HTML الصف مباشرة في وضع البث"""
+        if not self.current_table:
+            return ""
+        
+        if not self.streaming:
             self.current_table['rows'].append(cells)
+            return ""
+        
+        row_html = []
+        if self.current_table['row_count'] == 0:
+            row_html.append('    <tbody>')
+        self.current_table['row_count'] += 1
+        self._append_row(row_html, cells)
+        return '\n'.join(row_html)
+
+    def open_table(self, style_manager) -> str:
+        """HTML بداية الجدول الحالي مع رؤوس الأعمدة"""
+        table_html = []
+        self._append_head(table_html, style_manager)
+        return '\n'.join(table_html)
 
     def end_table(self, style_manager) -> str:
         """إنهاء الجدول وإرجاع HTML"""
         if not self.current_table:
             return ""
         
+        table_html = []
+        if self.streaming:
+            if self.current_table['row_count']:
+                table_html.append('    </tbody>')
+        else:
+            self._append_head(table_html, style_manager)
+            
+            # Body
+            if self.current_table['rows']:
+                table_html.append('    <tbody>')
+                for row in self.current_table['rows']:
+                    self._append_row(table_html, row)
+                table_html.append('    </tbody>')
+        
+        table_html.append('</table>')
+        
+        result = '\n'.join(table_html)
+        self.current_table = None
+        return result
+
+    def _append_head(self, table_html: list, style_manager):
         class_attr = style_manager.generate_css_class(self.current_table['style_attrs'])
         if class_attr:
             m = re.search(r'class="([^"]+)"', class_attr)
@@ -188,7 +288,6 @@ class TableManager:
         else:
             combined = ' class="white-table"'
         
-        table_html = []
         table_html.append(f'<table{combined}>')
         
         # Headers
@@ -200,23 +299,13 @@ class TableManager:
                 table_html.append(f'            <th>{clean_header}</th>')
             table_html.append('        </tr>')
             table_html.append('    </thead>')
-        
-        # Body
-        if self.current_table['rows']:
-            table_html.append('    <tbody>')
-            for row in self.current_table['rows']:
-                table_html.append('        <tr>')
-                for cell in row:
-                    clean_cell = cell.strip().strip('"').strip("'")
-                    table_html.append(f'            <td>{clean_cell}</td>')
-                table_html.append('        </tr>')
-            table_html.append('    </tbody>')
-        
-        table_html.append('</table>')
-        
-        result = '\n'.join(table_html)
-        self.current_table = None
-        return result
+
+    def _append_row(self, table_html: list, cells: list):
+        table_html.append('        <tr>')
+        for cell in cells:
+            clean_cell = cell.strip().strip('"').strip("'")
+            table_html.append(f'            <td>{clean_cell}</td>')
+        table_html.append('        </tr>')
 
 class FormManager:
     """إدارة النماذج"""
@@ -283,6 +372,11 @@ class FormManager:
 
 class VariableManager:
     """إدارة المتغيرات"""
+    # الحد الأقصى لذاكرة القوالب المقسمة، مشتركة بين كل المستندات
+    TEMPLATE_CACHE_SIZE = 4096
+    _VARIABLE_RE = re.compile(r'\{(\w+)\}')
+    _templates = {}
+    
     def __init__(self):
         self.variables = {}
     
@@ -294,45 +388,639 @@ class VariableManager:
         """الحصول على قيمة متغير"""
         return self.variables.get(name, f"{{{name}}}")
     
+    @classmethod
+    def _template(cls, text: str) -> tuple:
+        """تقسيم النص مرة واحدة إلى (نص، اسم متغير، نص، ...)"""
+        template = cls._templates.get(text)
+        if template is None:
+            if len(cls._templates) >= cls.TEMPLATE_CACHE_SIZE:
+                cls._templates.clear()
+            template = cls._templates[text] = tuple(cls._VARIABLE_RE.split(text))
+        return template
+    
     def replace_variables(self, text: str) -> str:
         """استبدال المتغيرات في النص"""
-        pattern = r'\{(\w+)\}'
-        
-        def replacer(match):
-            var_name = match.group(1)
-            return str(self.get_variable(var_name))
-        
-        return re.sub(pattern, replacer, text)
+        if '{' not in text:
+            return text
+        
+        template = self._template(text)
+        if len(template) == 1:
+            return text
+        
+        # العناصر الفردية أسماء متغيرات والزوجية نص ثابت
+        parts = list(template)
+        variables = self.variables
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            value = variables.get(name)
+            parts[i] = value if value is not None else f"{{{name}}}"
+        return ''.join(parts)
 
-class WhiteCompiler:
-    def __init__(self, theme_config=None):
-        self.style_manager = StyleManager()
+class CompileContext:
+    """حالة ترجمة مستند واحد: الأنماط المخصصة والمتغيرات والجداول والنماذج"""
+    __slots__ = ('style_manager', 'variable_manager', 'form_manager', 'table_manager',
+                 'metadata', 'html_output', 'base_dir', 'page_dir', 'emit', 'includes',
+                 'dependencies')
+
+    def __init__(self, style_manager, base_dir=None):
+        self.style_manager = style_manager
         self.variable_manager = VariableManager()
         self.form_manager = FormManager()
         self.table_manager = TableManager()
-        self.html_output = []
         self.metadata = {'title': 'White Language Output'}
+        self.html_output = []
+        # مجلد المصدر لحل المسارات النسبية مثل ملفات CSV
+        self.base_dir = base_dir
+        # مجلد الصفحة التي يُكتب فيها الناتج، تُكتب روابط الأجزاء المضمنة نسبة إليه
+        self.page_dir = base_dir
+        # في وضع البث: دالة تكتب أجزاء HTML الكبيرة مباشرة في الناتج
+        self.emit = None
+        # مسارات ملفات include الجارية لاكتشاف التضمين الدائري
+        self.includes = ()
+        # الملفات التي يعتمد عليها الناتج (include و CSV) لإعادة البناء عند تعديلها
+        self.dependencies = set()
+
+# مجلدات لا تحتوي مصادر White ويتم تخطيها في البحث التكراري
+IGNORED_DIRS = frozenset({'__pycache__', 'node_modules'})
+
+def _compile_globs(patterns):
+    """دمج أنماط glob في تعبير نمطي واحد، أو None إذا لم توجد أنماط"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns))
+
+# CSS الأساسي المحسوب مسبقاً لكل مجموعة إعدادات
+_BASE_CSS_CACHE = {}
+# قواعد CSS الأساسي مقسمة لكل ثيم: (القواعد، النص المتبقي، كل الميزات)
+_BASE_CSS_RULES = {}
+
+def _code_fingerprint(function) -> str:
+    """بصمة كود دالة (مع ثوابتها)، أو اسمها إن لم يكن لها كود Python"""
+    code = getattr(function, '__code__', None)
+    if code is None:
+        return getattr(function, '__qualname__', type(function).__qualname__)
+    try:
+        return hashlib.sha256(marshal.dumps(code)).hexdigest()[:16]
+    except ValueError:
+        return code.co_qualname if hasattr(code, 'co_qualname') else code.co_name
+
+# أقل عدد ملفات IR يُحتفظ به في .white-cache/ir بعد البناء
+IR_CACHE_MIN_ENTRIES = 1024
+
+def prune_ir_cache(directory: str, keep: int = IR_CACHE_MIN_ENTRIES):
+    """حذف IR الإصدارات السابقة من المترجم، والأقدم استخداماً إذا زاد العدد عن keep"""
+    try:
+        versions = os.listdir(directory)
+    except OSError:
+        return
+    for name in versions:
+        if name != COMPILER_FINGERPRINT:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    
+    entries = []
+    current = os.path.join(directory, COMPILER_FINGERPRINT)
+    for prefix in os.listdir(current) if os.path.isdir(current) else ():
+        with contextlib.suppress(OSError), os.scandir(os.path.join(current, prefix)) as scan:
+            for entry in scan:
+                with contextlib.suppress(OSError):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+    
+    if len(entries) > keep:
+        entries.sort()
+        for _, path in entries[:len(entries) - keep]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+def _dependency_mtimes(paths) -> tuple:
+    """((المسار، وقت التعديل أو None إذا لم يوجد)، ...) للتحقق لاحقاً"""
+    dependencies = []
+    for path in sorted(paths):
+        try:
+            dependencies.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            dependencies.append((path, None))
+    return tuple(dependencies)
+
+def _dependencies_fresh(dependencies) -> bool:
+    """هل لم يتغير أي ملف منذ _dependency_mtimes؟"""
+    for path, mtime_ns in dependencies:
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            if mtime_ns is not None:
+                return False
+    return True
+
+# ضغط الناتج في وضع minify
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCTUATION_RE = re.compile(r'\s*([{}:;,>])\s*')
+_HTML_TAG_GAP_RE = re.compile(r'(<[/!]?([\w-]+)[^<>]*>)\s*\n\s*(?=<[/!]?([\w-]+))')
+_HTML_LINE_GAP_RE = re.compile(r'\s*\n\s*')
+_HTML_TAG_NAME_RE = re.compile(r'<[/!]?([\w-]+)')
+# المسافة بجانب هذه الوسوم لا تظهر في الصفحة فيمكن حذفها، وبين العناصر السطرية
+# مثل a و span و button تظهر كمسافة فتُختصر إلى مسافة واحدة فقط. style و script
+# ليسا هنا لأن compile_stream يكتب style بين عنصرين سطريين فتبقى المسافة بينهما
+HTML_BLOCK_TAGS = frozenset({
+    'doctype', 'html', 'head', 'body', 'meta', 'title', 'link',
+    'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'table', 'thead',
+    'tbody', 'tr', 'th', 'td', 'form', 'pre', 'hr', 'br', 'header', 'footer', 'nav',
+    'main', 'section', 'article', 'aside',
+})
+_PRE_BLOCK_RE = re.compile(r'(<pre\b.*?</pre>)', re.S)
+
+def _minify_css(css: str) -> str:
+    """حذف التعليقات والمسافات غير اللازمة من CSS"""
+    css = _CSS_COMMENT_RE.sub('', css)
+    css = _CSS_SPACE_RE.sub(' ', css)
+    css = _CSS_PUNCTUATION_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def _is_block_tag(name: str) -> bool:
+    return name.lower() in HTML_BLOCK_TAGS
+
+def _block_gap(match) -> str:
+    if _is_block_tag(match.group(2)) or _is_block_tag(match.group(3)):
+        return match.group(1)
+    return match.group(1) + ' '
+
+def _html_gap(before: str, after: str) -> str:
+    """الفاصل بين جزأين مضغوطين: لا شيء بجانب وسم كتلي، وإلا مسافة واحدة"""
+    if before.endswith('>') and after.startswith('<'):
+        match = _HTML_TAG_NAME_RE.match(before, before.rfind('<'))
+        if match and _is_block_tag(match.group(1)):
+            return ''
+        match = _HTML_TAG_NAME_RE.match(after)
+        if match and _is_block_tag(match.group(1)):
+            return ''
+    return ' '
+
+def _minify_html(fragment: str) -> str:
+    """حذف المسافات البادئة والأسطر بين الوسوم مع إبقاء محتوى <pre> كما هو"""
+    if '\n' not in fragment:
+        return fragment.strip()
+    if '<pre' in fragment:
+        pieces = _PRE_BLOCK_RE.split(fragment)
+        return ''.join(piece if i % 2 else _minify_html(piece) for i, piece in enumerate(pieces))
+    fragment = _HTML_TAG_GAP_RE.sub(_block_gap, fragment)
+    return _HTML_LINE_GAP_RE.sub(' ', fragment).strip()
+
+# إزالة قواعد CSS الأساسي غير المستخدمة في الصفحة (tree_shake_css)
+# عناصر HTML في المحددات -> الميزة التي تحتاجها القاعدة
+CSS_ELEMENT_FEATURES = {'table': 'table', 'th': 'table', 'td': 'table', 'button': 'button', 'img': 'img',
+                        'ul': 'list', 'li': 'list', 'a': 'a', 'pre': 'pre', 'code': 'pre', 'hr': 'hr'}
+# علامات وجود كل ميزة في HTML الصفحة
+PAGE_FEATURE_MARKERS = {'table': ('<table', '<th', '<td'), 'button': ('<button',), 'img': ('<img',),
+                        'list': ('<ul', '<li'), 'a': ('<a',), 'pre': ('<pre', '<code'), 'hr': ('<hr',)}
+# أصناف يضعها قالب الصفحة في كل صفحة
+TEMPLATE_CLASSES = frozenset({'container'})
+_CSS_TOKEN_RE = re.compile(r'(?<![\w:-])(\.?)([a-zA-Z][\w-]*)')
+_CSS_ARGS_RE = re.compile(r'\([^)]*\)')
+_CLASS_ATTR_RE = re.compile(r'class="([^"]*)"')
+
+def _css_selector_features(selector: str) -> frozenset:
+    """الميزات التي يجب أن تكون كلها في الصفحة حتى يطابق المحدد شيئاً"""
+    features = set()
+    for dot, name in _CSS_TOKEN_RE.findall(_CSS_ARGS_RE.sub('', selector)):
+        if dot:
+            if name not in TEMPLATE_CLASSES:
+                features.add('class:' + name)
+        elif name in CSS_ELEMENT_FEATURES:
+            features.add(CSS_ELEMENT_FEATURES[name])
+    return frozenset(features)
+
+def _split_css(css: str):
+    """تقسيم CSS إلى قواعد المستوى الأعلى، وإرجاع (القواعد، النص المتبقي)
+    
+    كل قاعدة ('rule', النص، [ميزات كل محدد]) أو ('block', رأس @media، القواعد الداخلية، النهاية)،
+    وضم كل النصوص بالترتيب يعطي CSS الأصلي كما هو
+    """
+    entries = []
+    start = depth = i = 0
+    length = len(css)
+    while i < length:
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        char = css[i]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                text = css[start:i + 1]
+                brace = text.find('{')
+                selector = _CSS_COMMENT_RE.sub('', text[:brace]).strip()
+                if selector.startswith('@'):
+                    inner, inner_tail = _split_css(text[brace + 1:-1])
+                    entries.append(('block', text[:brace + 1], inner, inner_tail + '}'))
+                else:
+                    entries.append(('rule', text, [_css_selector_features(part) for part in selector.split(',')]))
+                start = i + 1
+        i += 1
+    return entries, css[start:]
+
+def _shake_css(entries, features) -> list:
+    """نصوص القواعد التي يطابق أحد محدداتها الميزات الموجودة"""
+    kept = []
+    for entry in entries:
+        if entry[0] == 'rule':
+            if any(needed <= features for needed in entry[2]):
+                kept.append(entry[1])
+        else:
+            inner = _shake_css(entry[2], features)
+            if inner:
+                kept.append(entry[1] + ''.join(inner) + entry[3])
+    return kept
+
+def _css_features(entries) -> frozenset:
+    """كل الميزات التي تذكرها القواعد"""
+    features = set()
+    for entry in entries:
+        if entry[0] == 'rule':
+            for needed in entry[2]:
+                features.update(needed)
+        else:
+            features.update(_css_features(entry[2]))
+    return frozenset(features)
+
+# علامات JPEG التي تحمل أبعاد الصورة (SOF0-SOF15 عدا DHT و JPG و DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def probe_image_size(path: str):
+    """(العرض، الارتفاع) من ترويسة PNG أو GIF أو WebP أو JPEG، أو None
+    
+    تُقرأ بايتات الترويسة فقط، وفي JPEG تُتخطى المقاطع حتى مقطع SOF
+    """
+    with open(path, 'rb') as file:
+        head = file.read(30)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) == 30:
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+            return None
+        if head[:2] != b'\xff\xd8':
+            return None
+        
+        file.seek(2)
+        while True:
+            if file.read(1) != b'\xff':
+                return None
+            marker = file.read(1)
+            while marker == b'\xff':
+                marker = file.read(1)
+            if not marker or marker[0] in (0xD9, 0xDA):
+                return None
+            if marker[0] == 0x01 or 0xD0 <= marker[0] <= 0xD8:
+                continue
+            segment = file.read(2)
+            if len(segment) < 2:
+                return None
+            if marker[0] in _JPEG_SOF_MARKERS:
+                data = file.read(5)
+                if len(data) < 5:
+                    return None
+                height, width = struct.unpack('>xHH', data)
+                return width, height
+            file.seek(struct.unpack('>H', segment)[0] - 2, 1)
+
+class FileTable:
+    """جدول JSON محفوظ على القرص: مسار ملف مطلق -> قيمة محسوبة منه
+    
+    يُحمل مرة واحدة لكل عملية. العمليات الفرعية ترجع إدخالاتها الجديدة عبر
+    take_updates لتُدمج في العملية الرئيسية بـ merge ثم تُحفظ بـ save.
+    """
+    
+    def __init__(self):
+        self.entries = {}
+        self.updates = {}
+        self.path = None
+    
+    def load(self, path: str):
+        """تحميل الجدول المحفوظ مرة واحدة لكل عملية"""
+        if self.path == path:
+            return
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+        if isinstance(entries, dict):
+            for filename, entry in entries.items():
+                self.entries.setdefault(filename, entry)
+    
+    def put(self, filename: str, entry):
+        self.entries[filename] = self.updates[filename] = entry
+    
+    def take_updates(self) -> dict:
+        updates = self.updates
+        self.updates = {}
+        return updates
+    
+    def merge(self, updates: dict):
+        """دمج إدخالات عملية فرعية"""
+        self.entries.update(updates)
+        self.updates.update(updates)
+    
+    def save(self):
+        """حفظ الجدول إذا تغير، بدون إدخالات الملفات المحذوفة"""
+        if not self.path or not self.updates:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        entries = {filename: entry for filename, entry in self.entries.items() if os.path.exists(filename)}
+        write_if_changed(self.path, json.dumps(entries, sort_keys=True).encode('utf-8'))
+        self.updates = {}
+
+class ImageSizeCache(FileTable):
+    """أبعاد الصور المحلية مفهرسة بالمسار ووقت التعديل
+    
+    تُحفظ في .white-cache/images.json فلا تُقرأ صور المعرض في كل بناء.
+    """
+    
+    def size(self, filename: str):
+        """(العرض، الارتفاع) للصورة، أو None إذا لم توجد أو لم يُعرف نوعها"""
+        try:
+            mtime_ns = os.stat(filename).st_mtime_ns
+        except OSError:
+            return None
+        
+        entry = self.entries.get(filename)
+        if entry is None or entry[0] != mtime_ns:
+            try:
+                size = probe_image_size(filename)
+            except (OSError, struct.error):
+                size = None
+            entry = [mtime_ns] + (list(size) if size else [None, None])
+            self.put(filename, entry)
+        return (entry[1], entry[2]) if entry[1] else None
+
+# جدول أبعاد الصور المشترك في هذه العملية
+IMAGE_SIZES = ImageSizeCache()
+
+def fingerprinted_name(filename: str, digest: str) -> str:
+    """name.ext -> name.<digest>.ext"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{digest}{ext}"
+
+class AssetFingerprints(FileTable):
+    """نسخ الملفات الثابتة بأسماء مشتقة من محتواها (name.<hash>.ext)
+    
+    تُحسب بصمة كل ملف مرة واحدة لكل (مسار، حجم، وقت تعديل) وتُحفظ في
+    .white-cache/assets.json، فلا يُعاد قراءة الملف في كل صفحة تستخدمه ولا في
+    كل بناء. النسخة تُنشأ بربط صلب إن أمكن وإلا بالنسخ.
+    """
+    
+    def digest(self, filename: str):
+        """بصمة محتوى الملف، أو None إذا لم يكن ملفاً موجوداً"""
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        if not os.path.isfile(filename):
+            return None
+        
+        entry = self.entries.get(filename)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            sha1 = hashlib.sha1()
+            with open(filename, 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    sha1.update(chunk)
+            entry = [stat.st_mtime_ns, stat.st_size, sha1.hexdigest()[:10]]
+            self.put(filename, entry)
+        
+        target = fingerprinted_name(filename, entry[2])
+        if not os.path.exists(target):
+            self._publish(filename, target)
+        return entry[2]
+    
+    @staticmethod
+    def _publish(filename: str, target: str):
+        """إنشاء النسخة ذات البصمة بشكل ذري"""
+        tmp_path = _temp_path(target)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        try:
+            os.link(filename, tmp_path)
+        except OSError:
+            shutil.copy2(filename, tmp_path)
+        os.replace(tmp_path, target)
+    
+    def write_manifest(self, path: str, root: str) -> bool:
+        """كتابة asset-manifest.json: المسار الأصلي -> المسار ذو البصمة، نسبة إلى root"""
+        root = os.path.abspath(root)
+        manifest = {}
+        for filename, entry in self.entries.items():
+            if not os.path.exists(filename) or os.path.commonpath([root, filename]) != root:
+                continue
+            key = os.path.relpath(filename, root).replace(os.sep, '/')
+            manifest[key] = fingerprinted_name(key, entry[2])
+        data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + '\n'
+        return write_if_changed(path, data.encode('utf-8'))
+
+# بصمات الملفات الثابتة المشتركة في هذه العملية
+ASSET_FINGERPRINTS = AssetFingerprints()
+ASSET_MANIFEST = 'asset-manifest.json'
+
+# أجزاء include المترجمة: (بصمة المحتوى، المجلد، مجلد الصفحة، الثيم، الأوامر المخصصة)
+# -> (HTML، الأنماط، الاعتماديات)
+FRAGMENT_CACHE_SIZE = 256
+_FRAGMENT_CACHE = {}
+
+class WhiteCompiler:
+    def __init__(self, theme_config=None):
+        # ألوان الثيم وذاكرة تحويل CSS مشتركة بين كل المستندات
+        self._styles = StyleManager()
+        
+        # حالة كل مستند في CompileContext خاص بكل thread، فيمكن لمترجم واحد
+        # خدمة عدة مستندات و threads دون تسرب الحالة بينها
+        self._local = threading.local()
+        
+        # Add theme configuration support
         self.theme_config = {
-        'minimal_css': False,
-        'enable_gradients': True,
-        'enable_shadows': True,
-        'container_centered': True,}
+            'minimal_css': False,  # Set to True for minimal CSS
+            'enable_gradients': True,
+            'enable_shadows': True,
+            'container_centered': True,
+            'minify': False,  # إخراج مضغوط بلا مسافات بادئة وأسطر
+            'tree_shake_css': True,  # CSS الأساسي للعناصر الموجودة في الصفحة فقط
+        }
         if theme_config:
             self.theme_config.update(theme_config)
         
+        # رابط ملف CSS أساسي مشترك بدلاً من تضمينه في كل صفحة
+        self.stylesheet_href = None
         
-    def find_white_files(self, path: str = "."):
-        """البحث عن جميع ملفات .white"""
-        white_files = []
+        # مجلد حفظ IR الناتج عن التحليل، مفهرس ببصمة المصدر
+        self.ir_cache_dir = None
         
-        if os.path.isfile(path) and path.endswith('.white'):
-            return [path]
+        # ربط الصور والملفات المحلية بنسخها ذات البصمة name.<hash>.ext
+        self.fingerprint_assets = False
         
-        if os.path.isdir(path):
-            pattern = os.path.join(path, "*.white")
-            white_files = glob.glob(pattern)
+        # نسخة خاصة بكل مترجم من جدول الأوامر حتى لا تؤثر الأوامر المخصصة على غيره
+        self._directives = dict(self.BUILTIN_DIRECTIVES)
+        # بصمة كود كل أمر مخصص، جزء من مفتاح IR المحفوظ
+        self._custom_directives = {}
+        # معالجات الأوامر المخصصة التي تُستدعى أثناء الإخراج (render=True)
+        self._render_handlers = {}
+    
+    @property
+    def context(self) -> CompileContext:
+        """سياق الترجمة الحالي في هذا الـ thread"""
+        context = getattr(self._local, 'context', None)
+        if context is None:
+            context = self.new_context()
+        return context
+    
+    def new_context(self, base_dir=None) -> CompileContext:
+        """بدء سياق ترجمة جديد لهذا الـ thread وإرجاعه"""
+        context = self._local.context = CompileContext(self._styles.fork(), base_dir)
+        return context
+    
+    style_manager = property(lambda self: self.context.style_manager)
+    variable_manager = property(lambda self: self.context.variable_manager)
+    form_manager = property(lambda self: self.context.form_manager)
+    table_manager = property(lambda self: self.context.table_manager)
+    
+    @property
+    def metadata(self) -> dict:
+        return self.context.metadata
+    
+    @metadata.setter
+    def metadata(self, value: dict):
+        self.context.metadata = value
+    
+    @property
+    def html_output(self) -> list:
+        return self.context.html_output
+    
+    @html_output.setter
+    def html_output(self, value: list):
+        self.context.html_output = value
+    
+    def compile_many(self, sources, executor=None) -> list:
+        """ترجمة عدة مستندات بنفس الإعدادات
+        
+        executor: مثل ThreadPoolExecutor لتوزيع المستندات على عدة threads
+        """
+        if executor is None:
+            return [self.compile_to_html(source) for source in sources]
+        return list(executor.map(self.compile_to_html, sources))
+    
+    def register_directive(self, name: str, handler, exact: bool = False, inline: bool = False,
+                           render: bool = False):
+        """تسجيل أمر مخصص يُستدعى بالشكل handler(compiler, line) ويعيد HTML
+        
+        exact: الأمر يطابق السطر كاملاً مثل endtable
+        inline: يسمح بمعالجة السطر كدمج span إذا احتوى عليه
+        render: استدعاء المعالج أثناء الإخراج بدلاً من التحليل
+        
+        بدون render يُستدعى المعالج مرة عند التحليل ويُحفظ ناتجه في IR، فيرى
+        المتغيرات لكن لا يرى حالة الإخراج مثل form_manager.current_form أو الجدول
+        المفتوح. مع render=True يُستدعى عند إخراج كل صفحة فيرى تلك الحالة، مع
+        المتغيرات كما كانت عند سطره، مثل button داخل form.
+        """
+        if not name or any(char.isspace() for char in name):
+            raise ValueError(f"invalid directive name: {name!r}")
+        
+        if render:
+            def parse_custom(compiler, line):
+                return ('custom', name, line, dict(compiler.variable_manager.variables))
+            
+            self._directives[name] = (parse_custom, exact, inline)
+            self._render_handlers[name] = handler
+            self._custom_directives[name] = _code_fingerprint(handler) + ':render'
+            return
+        
+        def parse_custom(compiler, line):
+            # حفظ الأنماط التي ينشئها المعالج مع مخرجاته داخل عقدة raw
+            styles_before = len(compiler.style_manager.custom_styles)
+            html = handler(compiler, line)
+            new_styles = dict(itertools.islice(compiler.style_manager.custom_styles.items(), styles_before, None))
+            return ('raw', html, new_styles) if html or new_styles else None
+        
+        self._directives[name] = (parse_custom, exact, inline)
+        self._render_handlers.pop(name, None)
+        self._custom_directives[name] = _code_fingerprint(handler)
+    
+    def find_white_files(self, path: str = ".", recursive: bool = False, include=None, exclude=None):
+        """البحث عن جميع ملفات .white بترتيب ثابت
         
-        return white_files
+        include/exclude: أنماط glob تُطابق المسار النسبي أو اسم الملف، ويُطبق
+        exclude على المجلدات أيضاً فيتم تخطيها بالكامل
+        """
+        return self._scan_white_files(path, recursive, include, exclude)[0]
+    
+    def _scan_white_files(self, path: str, recursive: bool = False, include=None, exclude=None):
+        """مسح واحد بـ os.scandir يعيد (الملفات، المجلدات التي تم فحصها)"""
+        if os.path.isfile(path) and path.endswith('.white'):
+            return [path], []
+        
+        if not os.path.isdir(path):
+            return [], []
+        
+        include_re = _compile_globs(include)
+        exclude_re = _compile_globs(exclude)
+        
+        def matches(pattern, rel_path, name):
+            return pattern.match(rel_path) is not None or pattern.match(name) is not None
+        
+        found = []
+        directories = []
+        stack = [(path, '')]
+        # (الجهاز، inode) لكل مجلد تمت زيارته، حتى لا تدور الروابط الرمزية مثل loop -> .. بلا نهاية
+        root_stat = os.stat(path)
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        while stack:
+            directory, rel_dir = stack.pop()
+            directories.append(directory)
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    # تخطي الملفات والمجلدات المخفية مثل .git و .white-cache
+                    if name.startswith('.'):
+                        continue
+                    
+                    rel_path = f"{rel_dir}{name}"
+                    if exclude_re and matches(exclude_re, rel_path, name):
+                        continue
+                    
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if recursive and name not in IGNORED_DIRS:
+                            try:
+                                stat = entry.stat()
+                            except OSError:
+                                continue
+                            if (stat.st_dev, stat.st_ino) not in visited:
+                                visited.add((stat.st_dev, stat.st_ino))
+                                stack.append((entry.path, rel_path + '/'))
+                    elif name.endswith('.white'):
+                        if include_re is None or matches(include_re, rel_path, name):
+                            found.append((rel_path, entry.path))
+        
+        found.sort()
+        return [entry_path for _, entry_path in found], directories
     
     def parse_file(self, filename: str) -> str:
         """تحليل ملف White"""
@@ -341,7 +1029,7 @@ class WhiteCompiler:
                 content = file.read()
             
             print(f"parsing {filename}")
-            return self.compile_to_html(content)
+            return self.compile_to_html(content, os.path.dirname(filename))
             
         except FileNotFoundError:
             error_msg = f"not found {filename}"
@@ -372,8 +1060,11 @@ class WhiteCompiler:
 </body>
 </html>"""
 
-    def handle_table(self, line: str) -> str:
+    def _parse_table(self, line: str):
         """معالجة أمر الجدول"""
+        if line.startswith('table from '):
+            return self._parse_table_from(line)
+        
         match = re.search(r'headers:\[(.+)\]', line)
         if match:
             headers_str = match.group(1)
@@ -401,11 +1092,120 @@ class WhiteCompiler:
             if current_header.strip():
                 headers.append(current_header.strip())
             
-            self.table_manager.start_table(headers)
+            return ('table', headers)
         
+        return None
+
+    def _render_table(self, node) -> str:
+        self.table_manager.start_table(node[1])
+        if self.table_manager.streaming:
+            return self.table_manager.open_table(self.style_manager)
         return ""
 
-    def handle_tablerow(self, line: str) -> str:
+    def _parse_table_from(self, line: str):
+        """جدول من ملف CSV أو TSV: table from "data.csv" headers:first"""
+        match = re.match(r'table from\s+(["\'])(.+?)\1', line)
+        if not match:
+            raise ValueError("table from needs a quoted file path")
+        
+        headers_first = re.search(r'headers:first\b', line[match.end():]) is not None
+        return ('tablefrom', match.group(2), headers_first)
+
+    def _render_table_from(self, node) -> str:
+        """قراءة الملف صفاً بصف وإخراج الجدول
+        
+        في وضع البث تُكتب الصفوف على دفعات عبر context.emit فلا يبقى الملف في
+        الذاكرة، وإلا تُجمع في نص واحد مثل بقية الصفحة.
+        """
+        path = os.path.abspath(os.path.join(self.context.base_dir or '.', node[1]))
+        self.context.dependencies.add(path)
+        delimiter = '\t' if os.path.splitext(path)[1].lower() in ('.tsv', '.tab') else ','
+        
+        emit = self.context.emit
+        chunks = []
+        
+        def flush():
+            if emit is not None:
+                emit('\n'.join(chunks))
+                chunks.clear()
+        
+        # جدول مستقل لا يؤثر على جدول مفتوح بـ table/endtable
+        table_manager = TableManager()
+        table_manager.streaming = True
+        
+        with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+            rows = csv.reader(file, delimiter=delimiter)
+            headers = None
+            if node[2]:
+                headers = [html.escape(cell) for cell in next(rows, [])]
+            table_manager.start_table(headers)
+            chunks.append(table_manager.open_table(self.style_manager))
+            
+            for row in rows:
+                chunks.append(table_manager.add_table_row([html.escape(cell) for cell in row]))
+                if len(chunks) >= self.TABLE_FROM_BATCH_ROWS:
+                    flush()
+        
+        chunks.append(table_manager.end_table(self.style_manager))
+        if emit is not None:
+            flush()
+            return ""
+        return '\n'.join(chunks)
+
+    def _parse_include(self, line: str):
+        """تضمين ملف White آخر، مثل include "partials/nav.white" """
+        match = re.match(r'include\s+(["\'])(.+?)\1', line)
+        if not match:
+            raise ValueError("include needs a quoted file path")
+        return ('include', match.group(2))
+
+    def _render_include(self, node) -> str:
+        """إخراج ملف مضمن من ذاكرة الأجزاء أو ترجمته مرة واحدة
+        
+        يُترجم الجزء في سياق منفصل فلا يرى متغيرات الصفحة ولا يغيرها، لذا يمكن
+        إعادة استخدام ناتجه في كل الصفحات. تُضاف أنماطه المخصصة إلى الصفحة.
+        """
+        context = self.context
+        path = os.path.abspath(os.path.join(context.base_dir or '.', node[1]))
+        context.dependencies.add(path)
+        if path in context.includes:
+            raise ValueError(f"include cycle: {' -> '.join(context.includes + (path,))}")
+        
+        with open(path, 'rb') as file:
+            data = file.read()
+        
+        key = (hashlib.sha256(data).hexdigest(), os.path.dirname(path),
+               os.path.abspath(context.page_dir or '.'), self._theme_key(), self.fingerprint_assets,
+               tuple(sorted(self._custom_directives.items())))
+        fragment = _FRAGMENT_CACHE.get(key)
+        if fragment is not None and not _dependencies_fresh(fragment[2]):
+            fragment = None
+        if fragment is None:
+            if len(_FRAGMENT_CACHE) >= FRAGMENT_CACHE_SIZE:
+                _FRAGMENT_CACHE.clear()
+            fragment = _FRAGMENT_CACHE[key] = self._compile_fragment(data.decode('utf-8'), path)
+        
+        fragment_html, styles, dependencies = fragment
+        self.style_manager.custom_styles.update(styles)
+        context.dependencies.update(dependency for dependency, _ in dependencies)
+        return fragment_html
+
+    def _compile_fragment(self, source_code: str, path: str) -> tuple:
+        """ترجمة ملف مضمن في سياق منفصل ثم العودة لسياق الصفحة"""
+        outer = self.context
+        try:
+            _, _, nodes = self.parse_to_ir(source_code)
+            context = self.new_context(os.path.dirname(path))
+            context.page_dir = outer.page_dir
+            context.includes = outer.includes + (path,)
+            fragment_html = '\n'.join(self._render_nodes(nodes))
+        finally:
+            self._local.context = outer
+        
+        return (fragment_html, dict(context.style_manager.custom_styles),
+                _dependency_mtimes(context.dependencies))
+
+    def _parse_tablerow(self, line: str):
         """معالجة صف الجدول"""
         content = line[8:].strip()
         
@@ -433,14 +1233,16 @@ class WhiteCompiler:
         if current_cell.strip():
             cells.append(current_cell.strip())
         
-        self.table_manager.add_table_row(cells)
-        return ""
+        return ('tablerow', cells)
+
+    def _render_tablerow(self, node) -> str:
+        return self.table_manager.add_table_row(node[1])
 
-    def handle_endtable(self) -> str:
+    def _render_endtable(self, node) -> str:
         """إنهاء الجدول"""
         return self.table_manager.end_table(self.style_manager)
 
-    def handle_form(self, line: str) -> str:
+    def _parse_form(self, line: str):
         """معالجة بدء النموذج"""
         content = line[4:].strip()
         content, style_attrs = self.style_manager.parse_style_attributes(content)
@@ -461,10 +1263,14 @@ class WhiteCompiler:
         if name_match:
             name = name_match.group(1)
         
+        return ('form', action, method, name, style_attrs)
+
+    def _render_form(self, node) -> str:
+        _, action, method, name, style_attrs = node
         self.form_manager.start_form(action, method, name, style_attrs)
         return ""
 
-    def handle_input(self, line: str) -> str:
+    def _parse_input(self, line: str):
         """معالجة حقل الإدخال"""
         content = line[5:].strip()
         
@@ -490,13 +1296,17 @@ class WhiteCompiler:
         if 'required' in content:
             required = True
         
+        return ('input', label, input_type, name, required)
+
+    def _render_input(self, node) -> str:
+        _, label, input_type, name, required = node
         required_attr = ' required' if required else ''
         input_html = f'<div class="form-group"><label for="{name}">{label}</label><input type="{input_type}" id="{name}" name="{name}"{required_attr} class="form-control"></div>'
         
         self.form_manager.add_form_element(input_html)
         return ""
 
-    def handle_select(self, line: str) -> str:
+    def _parse_select(self, line: str):
         """معالجة قائمة الاختيار"""
         content = line[6:].strip()
         
@@ -544,6 +1354,10 @@ class WhiteCompiler:
         if 'required' in content:
             required = True
         
+        return ('select', label, name, options, required)
+
+    def _render_select(self, node) -> str:
+        _, label, name, options, required = node
         required_attr = ' required' if required else ''
         
         select_html = [f'<div class="form-group"><label for="{name}">{label}</label>']
@@ -558,7 +1372,7 @@ class WhiteCompiler:
         self.form_manager.add_form_element('\n'.join(select_html))
         return ""
 
-    def handle_textarea(self, line: str) -> str:
+    def _parse_textarea(self, line: str):
         """معالجة منطقة النص"""
         content = line[8:].strip()
         
@@ -580,85 +1394,97 @@ class WhiteCompiler:
         if rows_match:
             rows = rows_match.group(1)
         
+        return ('textarea', label, name, rows)
+
+    def _render_textarea(self, node) -> str:
+        _, label, name, rows = node
         textarea_html = f'<div class="form-group"><label for="{name}">{label}</label><textarea id="{name}" name="{name}" rows="{rows}" class="form-control"></textarea></div>'
         
         self.form_manager.add_form_element(textarea_html)
         return ""
 
-    def handle_endform(self) -> str:
+    def _render_endform(self, node) -> str:
         """إنهاء النموذج"""
         return self.form_manager.end_form(self.style_manager)
 
-    def handle_span_concatenation(self, line: str) -> str:
-        """معالجة دمج النصوص مع span"""
+    # بداية محتوى span: مسافات ثم علامة اقتباس اختيارية
+    _SPAN_OPEN_RE = re.compile(r'[ ]*(["\'])?')
+    _SPAN_COLOR_RE = re.compile(r'color:([^\s+]+)')
+    _SPAN_WEIGHT_RE = re.compile(r'weight:([^\s+]+)')
+
+    def _parse_span_concatenation(self, line: str):
+        """معالجة دمج النصوص مع span
+        
+        مرور واحد على السطر: كل جزء يبدأ بعد آخر + أو span، وخصائص كل span
+        تُقرأ من جزئه فقط حتى + التالية
+        """
         parts = []
-        current_part = ""
-        i = 0
-        
-        while i < len(line):
-            if line[i:i+5] == 'span ':
-                if current_part.strip():
-                    parts.append(('text', current_part.strip().strip('"').strip("'")))
-                    current_part = ""
+        length = len(line)
+        
+        def add_text(text):
+            text = text.strip()
+            if text:
+                parts.append(('text', text.strip('"').strip("'")))
+        
+        pos = 0
+        next_plus = line.find('+')
+        next_span = line.find('span ')
+        while pos < length:
+            if next_plus != -1 and next_plus < pos:
+                next_plus = line.find('+', pos)
+            if next_span != -1 and next_span < pos:
+                next_span = line.find('span ', pos)
+            
+            if next_span != -1 and (next_plus == -1 or next_span < next_plus):
+                add_text(line[pos:next_span])
                 
-                span_start = i + 5
+                match = self._SPAN_OPEN_RE.match(line, next_span + 5)
+                j = match.end()
                 span_content = ""
-                quote_char = None
-                
-                j = span_start
-                while j < len(line) and line[j] in [' ', '"', "'"]:
-                    if line[j] in ['"', "'"]:
-                        quote_char = line[j]
-                        j += 1
-                        break
-                    j += 1
-                
+                quote_char = match.group(1)
                 if quote_char:
-                    while j < len(line) and line[j] != quote_char:
-                        span_content += line[j]
-                        j += 1
-                    j += 1
+                    end = line.find(quote_char, j)
+                    if end == -1:
+                        end = length
+                    span_content = line[j:end]
+                    j = end + 1
                 
+                # الخصائص حتى + التالية، وما بعد آخر span بلا + يُتجاهل
+                end = line.find('+', j) if j < length else -1
+                attrs_end = length if end == -1 else end
                 span_attrs = {}
-                remaining = line[j:].strip()
-                if remaining.startswith(' '):
-                    remaining = remaining[1:]
-                
-                color_match = re.search(r'color:([^\s+]+)', remaining)
+                color_match = self._SPAN_COLOR_RE.search(line, j, attrs_end)
                 if color_match:
                     span_attrs['color'] = color_match.group(1)
-                
-                weight_match = re.search(r'weight:([^\s+]+)', remaining)
+                weight_match = self._SPAN_WEIGHT_RE.search(line, j, attrs_end)
                 if weight_match:
                     span_attrs['weight'] = weight_match.group(1)
                 
                 parts.append(('span', span_content, span_attrs))
-                
-                next_plus = remaining.find('+')
-                if next_plus != -1:
-                    i = j + next_plus + 1
-                else:
+                if end == -1:
                     break
-                    
-            elif line[i] == '+':
-                if current_part.strip():
-                    parts.append(('text', current_part.strip().strip('"').strip("'")))
-                    current_part = ""
-                i += 1
+                pos = end + 1
+            elif next_plus != -1:
+                add_text(line[pos:next_plus])
+                pos = next_plus + 1
             else:
-                current_part += line[i]
-                i += 1
+                add_text(line[pos:])
+                break
         
-        if current_part.strip():
-            parts.append(('text', current_part.strip().strip('"').strip("'")))
+        # استبدال المتغيرات في مرحلة التحليل، والألوان في مرحلة الإخراج
+        replace_variables = self.variable_manager.replace_variables
+        for index, part in enumerate(parts):
+            parts[index] = (part[0], replace_variables(part[1])) + part[2:]
         
+        return ('spans', parts)
+
+    def _render_spans(self, node) -> str:
         html_parts = []
-        for part in parts:
+        for part in node[1]:
             if part[0] == 'text':
-                text = self.variable_manager.replace_variables(part[1])
-                html_parts.append(text)
+                html_parts.append(part[1])
             elif part[0] == 'span':
-                content = self.variable_manager.replace_variables(part[1])
+                content = part[1]
                 attrs = part[2] if len(part) > 2 else {}
                 
                 style = ""
@@ -674,71 +1500,43 @@ class WhiteCompiler:
                 style_attr = f' style="{style.strip()}"' if style else ''
                 html_parts.append(f'<span{style_attr}>{content}</span>')
         
-        return ''.join(html_parts)
+        return f"<p>{''.join(html_parts)}</p>"
 
     def parse_line(self, line: str) -> str:
         """تحليل سطر واحد والعودة بـ HTML"""
+        node = self.parse_line_node(line)
+        return self._render_node(node) if node else ""
+
+    def parse_line_node(self, line: str):
+        """تحليل سطر واحد إلى عقدة IR، أو None إذا لم ينتج السطر شيئاً"""
         line = line.strip()
         if not line or line.startswith("//") or line.startswith('#'):
-            return ""
-        
-        if line.startswith("table "):
-            return self.handle_table(line)
-        elif line.startswith("tablerow "):
-            return self.handle_tablerow(line)
-        elif line == "endtable":
-            return self.handle_endtable()
-        elif line.startswith("form "):
-            return self.handle_form(line)
-        elif line.startswith("input "):
-            return self.handle_input(line)
-        elif line.startswith("select "):
-            return self.handle_select(line)
-        elif line.startswith("textarea "):
-            return self.handle_textarea(line)
-        elif line == "endform":
-            return self.handle_endform()
-        elif 'span ' in line and ('+' in line or 'span "' in line):
-            return f"<p>{self.handle_span_concatenation(line)}</p>"
-        elif line.startswith("image "):
-            return self._handle_image(line)
-        elif line.startswith("span "):
-            return self._handle_span(line)
-        elif line.startswith("title "):
-            return self._handle_title(line)
-        elif line.startswith("button "):
-            return self._handle_button(line)
-        elif line.startswith("print "):
-            return self._handle_print(line)
-        elif line.startswith("header "):
-            return self._handle_header(line)
-        elif line.startswith("paragraph "):
-            return self._handle_paragraph(line)
-        elif line.startswith("link "):
-            return self._handle_link(line)
-        elif line.startswith("list "):
-            return self._handle_list(line)
-        elif line.startswith("var"):
-            args = line.split()
-            var_name = args[1]
-            value = " ".join(args[3:]).strip("\"'")
-            self.variable_manager.set_variable(var_name, value)
-            return ""
-        elif line.startswith("code "):
-            return self._handle_code(line)
-        elif line.startswith("div "):
-            return self._handle_div(line)
-        elif line == "br":
-            return "<br>"
-        elif line == "hr":
-            return "<hr>"
-        else:
-            content = self.variable_manager.replace_variables(line)
-            return f"<p>{content}</p>"
-        
-        return f"<p>{line}</p>"
+            return None
+        
+        # اختيار المعالج حسب الكلمة الأولى بدلاً من سلسلة startswith
+        name, sep, _ = line.partition(' ')
+        handler = None
+        entry = self._directives.get(name)
+        if entry is not None:
+            handler, exact, inline = entry
+            if exact == bool(sep):
+                handler = None
+            elif not inline:
+                return handler(self, line)
+        
+        if 'span ' in line and ('+' in line or 'span "' in line):
+            return self._parse_span_concatenation(line)
+        
+        if handler is not None:
+            return handler(self, line)
+        
+        return ('text', self.variable_manager.replace_variables(line))
+
+    def _render_node(self, node) -> str:
+        """تحويل عقدة IR إلى HTML"""
+        return self.RENDERERS[node[0]](self, node)
 
-    def _handle_image(self, line: str) -> str:
+    def _parse_image(self, line: str):
         """معالجة الصور"""
         match = re.search(r'image\s+"([^"]+)"', line)
         src = match.group(1) if match else ""
@@ -752,16 +1550,86 @@ class WhiteCompiler:
         match_r = re.search(r'radius:(\d+)', line)
         radius = match_r.group(1) if match_r else ""
         
+        return ('image', src, alt, width, radius)
+
+    def _render_image(self, node) -> str:
+        _, src, alt, width, radius = node
         style = ""
         if radius:
             style += f"border-radius:{radius}px;"
         
+        # أبعاد الصورة المحلية حتى يحجز المتصفح مكانها قبل تحميلها
+        height = ""
+        size = self._image_size(src)
+        if size:
+            if width:
+                height = str(round(size[1] * int(width) / size[0])) if size[0] else ""
+            else:
+                width, height = size
+        
         width_attr = f' width="{width}"' if width else ""
+        height_attr = f' height="{height}"' if height else ""
         style_attr = f' style="{style}"' if style else ""
         
-        return f'<img src="{src}" alt="{alt}"{width_attr}{style_attr}>'
+        if self.fingerprint_assets:
+            src = self._asset_url(src)
+        src = self._page_url(src)
+        
+        return f'<img src="{src}" alt="{alt}"{width_attr}{height_attr} loading="lazy" decoding="async"{style_attr}>'
+
+    def _local_path(self, url: str):
+        """المسار المطلق لرابط نسبي إلى ملف محلي، أو None للروابط الخارجية والمطلقة"""
+        if not url or url.startswith(('/', '#', 'data:', 'mailto:', 'tel:', 'javascript:')) or '://' in url:
+            return None
+        path = urllib.parse.unquote(url.split('#', 1)[0].split('?', 1)[0])
+        if not path:
+            return None
+        return os.path.abspath(os.path.join(self.context.base_dir or '.', path))
+
+    def _image_size(self, src: str):
+        """أبعاد الصورة إذا كان src ملفاً محلياً نسبياً لمجلد المصدر"""
+        path = self._local_path(src)
+        if path is None:
+            return None
+        size = IMAGE_SIZES.size(path)
+        if size:
+            # تغير أبعاد الصورة يغير الناتج فتُعاد ترجمة الصفحة
+            self.context.dependencies.add(path)
+        return size
+
+    def _asset_url(self, url: str) -> str:
+        """الرابط إلى نسخة الملف ذات البصمة، أو الرابط نفسه إن لم يكن ملفاً محلياً"""
+        path = self._local_path(url)
+        if path is None:
+            return url
+        digest = ASSET_FINGERPRINTS.digest(path)
+        if digest is None:
+            return url
+        # تغير محتوى الملف يغير بصمته فتُعاد ترجمة الصفحة
+        self.context.dependencies.add(path)
+        
+        end = min((index for index in (url.find('?'), url.find('#')) if index >= 0), default=len(url))
+        directory, _, filename = url[:end].rpartition('/')
+        filename = fingerprinted_name(filename, digest)
+        return (f"{directory}/{filename}" if directory else filename) + url[end:]
 
-    def _handle_span(self, line: str) -> str:
+    def _page_url(self, url: str) -> str:
+        """رابط نسبي لمجلد الملف المضمن بعد تحويله ليكون نسبياً لمجلد الصفحة
+        
+        يكتب مؤلف الجزء الروابط نسبة لملفه، فيعمل نفس الجزء في صفحات بأعماق مختلفة
+        """
+        context = self.context
+        if context.base_dir == context.page_dir or self._local_path(url) is None:
+            return url
+        prefix = os.path.relpath(os.path.abspath(context.base_dir or '.'),
+                                 os.path.abspath(context.page_dir or '.')).replace(os.sep, '/')
+        end = min((index for index in (url.find('?'), url.find('#')) if index >= 0), default=len(url))
+        path = posixpath.normpath(posixpath.join(prefix, url[:end]))
+        if url[:end].endswith('/') and not path.endswith('/'):
+            path += '/'
+        return path + url[end:]
+
+    def _parse_span(self, line: str):
         """معالجة span"""
         match = re.search(r'span\s+"([^"]+)"', line)
         text = match.group(1) if match else ""
@@ -772,6 +1640,10 @@ class WhiteCompiler:
         match_color = re.search(r'color:([^\s]+)', line)
         color = match_color.group(1) if match_color else ""
         
+        return ('span', text, cls, color)
+
+    def _render_span(self, node) -> str:
+        _, text, cls, color = node
         if color in self.style_manager.theme_colors:
             color = self.style_manager.theme_colors[color]
         
@@ -780,41 +1652,344 @@ class WhiteCompiler:
         
         return f'<span{class_attr}{style}>{text}</span>'
     
-    def compile_to_html(self, source_code: str) -> str:
-        """تحويل كود White إلى HTML"""
-        self.html_output = []
+    def compile_to_html(self, source_code: str, base_dir=None) -> str:
+        """تحويل كود White إلى HTML
+        
+        base_dir: مجلد المصدر لحل المسارات النسبية، الافتراضي المجلد الحالي
+        """
+        return self.render_ir(self._cached_ir(source_code), base_dir)
+    
+    def _cached_ir(self, source_code: str):
+        """IR المحفوظ للمصدر، أو تحليله وحفظه"""
+        ir = None
+        if self.ir_cache_dir:
+            ir = self._load_ir(source_code)
+        if ir is None:
+            ir = self.parse_to_ir(source_code)
+            if self.ir_cache_dir:
+                self._store_ir(source_code, ir)
+        return ir
+    
+    def asset_paths(self, white_file: str, seen=None) -> set:
+        """الملفات المحلية التي يأخذها fingerprint_assets في صفحة ومضمناتها، دون إخراجها"""
+        seen = set() if seen is None else seen
+        white_file = os.path.abspath(white_file)
+        if white_file in seen:
+            return set()
+        seen.add(white_file)
+        
+        with open(white_file, 'r', encoding='utf-8') as file:
+            _, _, nodes = self._cached_ir(file.read())
+        self.new_context(os.path.dirname(white_file))
+        
+        paths = set()
+        for _, node in nodes:
+            if node[0] == 'image':
+                url = node[1]
+            elif node[0] == 'link' and not self._PAGE_LINK_RE.search(node[2]):
+                url = node[2]
+            elif node[0] == 'include':
+                include = os.path.join(os.path.dirname(white_file), node[1])
+                with contextlib.suppress(OSError, ValueError):
+                    paths.update(self.asset_paths(include, seen))
+                    self.new_context(os.path.dirname(white_file))
+                continue
+            else:
+                continue
+            path = self._local_path(url)
+            if path is not None:
+                paths.add(path)
+        return paths
+    
+    def parse_to_ir(self, source_code: str):
+        """مرحلة التحليل: تحويل المصدر إلى (IR_VERSION, metadata, nodes)
+        
+        كل عقدة tuple تبدأ بنوعها، وتُحفظ مع رقم سطرها. لا تعتمد العقد على
+        الثيم أو الإعدادات، لذا يمكن حفظها وإعادة إخراجها بإعدادات مختلفة.
+        """
+        self.new_context()
         
         lines = source_code.strip().split('\n')
+        metadata = {}
         for line in lines:
             line = line.strip()
             if line.startswith('meta '):
-                self._handle_meta(line)
-        
-        self._generate_html_head()
+                item = self._parse_meta(line)
+                if item:
+                    metadata[item[0]] = item[1]
         
+        nodes = []
         for line_num, line in enumerate(lines, 1):
-            try:
-                line = line.strip()
-                if line and not line.startswith('#') and not line.startswith('meta '):
-                    html_output = self.parse_line(line)
-                    if html_output:
-                        self.html_output.append(html_output)
-            except Exception as e:
-                error_html = f'<div style="background: #f8d7da; color: #721c24; padding: 10px; margin: 5px 0; border-radius: 5px;">خطأ في السطر {line_num}: {str(e)}</div>'
-                self.html_output.append(error_html)
-                print(f"⚠️ خطأ في السطر {line_num}: {str(e)}")
-        
-        # إنهاء أي جدول أو نموذج مفتوح
+            node = self._parse_line_safe(line_num, line)
+            if node:
+                nodes.append((line_num, node))
+        
+        return (IR_VERSION, metadata, nodes)
+    
+    def render_ir(self, ir, base_dir=None) -> str:
+        """مرحلة الإخراج: تحويل IR ناتج عن parse_to_ir إلى صفحة HTML كاملة"""
+        _, metadata, nodes = ir
+        self.new_context(base_dir)
+        self.metadata.update(metadata)
+        
+        # إنشاء الرأس بعد المحتوى حتى يتضمن كل الأنماط المخصصة المستخدمة في الصفحة
+        # و CSS الأساسي للعناصر الموجودة فيها فقط
+        body = self._render_nodes(nodes)
+        features = None
+        if self.theme_config.get('tree_shake_css') and not self.stylesheet_href:
+            features = self._page_features(body)
+        self._generate_html_head(features)
+        self.html_output.extend(body)
+        
+        self._generate_html_footer()
+        return self._join_html(self.html_output)
+    
+    @staticmethod
+    def _page_features(parts: list) -> set:
+        """العناصر والأصناف الموجودة في أجزاء HTML الصفحة"""
+        features = set()
+        markers = dict(PAGE_FEATURE_MARKERS)
+        for part in parts:
+            if '<' not in part:
+                continue
+            for feature, needles in list(markers.items()):
+                if any(needle in part for needle in needles):
+                    features.add(feature)
+                    del markers[feature]
+            if 'class="' in part:
+                for match in _CLASS_ATTR_RE.finditer(part):
+                    features.update('class:' + name for name in match.group(1).split())
+        return features
+    
+    def _join_html(self, parts: list) -> str:
+        """ضم أجزاء HTML بأسطر جديدة، أو مضغوطة في وضع minify"""
+        if not self.theme_config.get('minify'):
+            return '\n'.join(parts)
+        
+        joined = []
+        for part in parts:
+            part = _minify_html(part)
+            if part:
+                if joined:
+                    joined.append(_html_gap(joined[-1], part))
+                joined.append(part)
+        return ''.join(joined)
+    
+    def _style_rule(self, selector: str, rules: str) -> str:
+        """سطر CSS لنمط مخصص"""
+        if self.theme_config.get('minify'):
+            return f'{selector}{{{_minify_css(rules)}}}'
+        return f'        {selector} {{ {rules}; }}'
+    
+    def _render_nodes(self, nodes) -> list:
+        """إخراج العقد في السياق الحالي وإرجاع أجزاء HTML مع إغلاق أي جدول أو نموذج مفتوح"""
+        for line_num, node in nodes:
+            html_output = self._render_node_safe(line_num, node)
+            if html_output:
+                self.html_output.append(html_output)
+        
         if self.table_manager.current_table:
             self.html_output.append(self.table_manager.end_table(self.style_manager))
         if self.form_manager.current_form:
             self.html_output.append(self.form_manager.end_form(self.style_manager))
         
-        self._generate_html_footer()
-        return '\n'.join(self.html_output)
+        body = self.html_output
+        self.html_output = []
+        return body
+    
+    def _ir_cache_path(self, source_code: str) -> str:
+        """مسار IR المحفوظ، مفتاحه بصمة المصدر وكود المترجم والأوامر المخصصة
+        
+        يُحفظ في مجلد باسم بصمة المترجم فيسهل حذف ما حفظته الإصدارات السابقة
+        """
+        key = hashlib.sha256()
+        custom = ' '.join(f"{name}:{code}" for name, code in sorted(self._custom_directives.items()))
+        key.update(f"{IR_VERSION}\0{custom}\0".encode('utf-8'))
+        key.update(source_code.encode('utf-8'))
+        digest = key.hexdigest()
+        return os.path.join(self.ir_cache_dir, COMPILER_FINGERPRINT, digest[:2], f"{digest}.ir")
+    
+    def _load_ir(self, source_code: str):
+        path = self._ir_cache_path(source_code)
+        try:
+            with open(path, 'rb') as file:
+                ir = marshal.load(file)
+            # وقت التعديل هو آخر استخدام، فيحذف prune_ir_cache الأقدم استخداماً
+            os.utime(path)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return ir if ir[0] == IR_VERSION else None
+    
+    def _store_ir(self, source_code: str, ir):
+        path = self._ir_cache_path(source_code)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_if_changed(path, marshal.dumps(ir))
+        except (OSError, ValueError):
+            # الذاكرة المؤقتة اختيارية: الفشل في الحفظ لا يوقف الترجمة
+            pass
+    
+    def compile_stream(self, source_iterable, sink, base_dir=None):
+        """تحويل كود White إلى HTML سطراً بسطر وكتابة الناتج مباشرة في sink
+        
+        لا يُحتفظ بالمصدر أو الناتج كاملاً في الذاكرة، وتُكتب صفوف الجداول فور قراءتها.
+        أوامر meta يجب أن تسبق أول سطر محتوى، وتُكتب الأنماط المخصصة في وسم
+        <style> قبل أول عنصر يستخدمها.
+        """
+        self.new_context(base_dir)
+        self.table_manager.streaming = True
+        head_written = False
+        styles_written = 0
+        minify = self.theme_config.get('minify')
+        last = None
+        
+        def write(fragment):
+            # كل جزء في سطر جديد، أو مضغوط في وضع minify كما في _join_html
+            nonlocal last
+            if not minify:
+                sink.write(fragment if last is None else '\n' + fragment)
+                last = ''
+                return
+            fragment = _minify_html(fragment)
+            if fragment:
+                if last:
+                    sink.write(_html_gap(last, fragment))
+                sink.write(fragment)
+                last = fragment
+        
+        def write_styles():
+            nonlocal styles_written
+            custom_styles = self.style_manager.custom_styles
+            if len(custom_styles) > styles_written:
+                style_html = ['<style>']
+                for selector, rules in itertools.islice(custom_styles.items(), styles_written, None):
+                    style_html.append(self._style_rule(selector, rules))
+                style_html.append('</style>')
+                write(self._join_html(style_html))
+                styles_written = len(custom_styles)
+        
+        def write_head():
+            nonlocal head_written, styles_written
+            self._generate_html_head()
+            write(self._join_html(self.html_output))
+            self.html_output = []
+            styles_written = len(self.style_manager.custom_styles)
+            head_written = True
+        
+        def emit(fragment):
+            write_styles()
+            write(fragment)
+        self.context.emit = emit
+        
+        try:
+            for line_num, line in enumerate(source_iterable, 1):
+                line = line.strip()
+                if not head_written:
+                    if line.startswith('meta '):
+                        self._handle_meta(line)
+                        continue
+                    if not line or line.startswith('#') or line.startswith('//'):
+                        continue
+                    write_head()
+                
+                html_output = self._compile_line(line_num, line)
+                if html_output:
+                    write_styles()
+                    write(html_output)
+            
+            if not head_written:
+                write_head()
+            
+            # إنهاء أي جدول أو نموذج مفتوح
+            closing = []
+            if self.table_manager.current_table:
+                closing.append(self.table_manager.end_table(self.style_manager))
+            if self.form_manager.current_form:
+                closing.append(self.form_manager.end_form(self.style_manager))
+            if closing:
+                write_styles()
+            
+            self._generate_html_footer()
+            closing.extend(self.html_output)
+            write(self._join_html(closing))
+        finally:
+            self.html_output = []
+            self.table_manager.streaming = False
+    
+    def enable_profiling(self, profiler):
+        """قياس زمن كل سطر حسب الأمر المستخدم
+        
+        يستبدل _parse_line_safe و _render_node_safe لهذا المترجم فقط، فلا كلفة
+        إضافية عند عدم التفعيل. يُسجل زمن الإخراج باسم <نوع العقدة>:render
+        """
+        def profiled_parse(line_num, line):
+            started = time.perf_counter()
+            node = WhiteCompiler._parse_line_safe(self, line_num, line)
+            profiler.record(self._directive_name(line), time.perf_counter() - started, line_num, line.strip())
+            return node
+        
+        def profiled_render(line_num, node):
+            started = time.perf_counter()
+            result = WhiteCompiler._render_node_safe(self, line_num, node)
+            profiler.record(f"{node[0]}:render", time.perf_counter() - started, line_num, f"<{node[0]}>")
+            return result
+        
+        self._parse_line_safe = profiled_parse
+        self._render_node_safe = profiled_render
+    
+    def _directive_name(self, line: str) -> str:
+        """اسم الأمر الذي سيعالج السطر، بنفس قواعد parse_line"""
+        line = line.strip()
+        if not line or line.startswith("//") or line.startswith('#'):
+            return 'comment'
+        if line.startswith('meta '):
+            return 'meta'
+        
+        name, sep, _ = line.partition(' ')
+        entry = self._directives.get(name)
+        if entry is not None and entry[1] != bool(sep):
+            if not entry[2]:
+                return name
+        else:
+            name = 'text'
+        
+        if 'span ' in line and ('+' in line or 'span "' in line):
+            return 'span+'
+        return name
+    
+    def _compile_line(self, line_num: int, line: str) -> str:
+        """تحليل سطر واحد وإخراجه مباشرة (وضع البث)"""
+        node = self._parse_line_safe(line_num, line)
+        return self._render_node_safe(line_num, node) if node else ""
+    
+    def _parse_line_safe(self, line_num: int, line: str):
+        """تحليل سطر مع تحويل الأخطاء إلى عقدة error"""
+        try:
+            line = line.strip()
+            if line and not line.startswith('#') and not line.startswith('meta '):
+                return self.parse_line_node(line)
+        except Exception as e:
+            print(f"⚠️ خطأ في السطر {line_num}: {str(e)}")
+            return ('error', line_num, str(e))
+        return None
+    
+    def _render_node_safe(self, line_num: int, node) -> str:
+        """إخراج عقدة مع تحويل الأخطاء إلى رسالة داخل الصفحة"""
+        try:
+            return self._render_node(node)
+        except Exception as e:
+            print(f"⚠️ خطأ في السطر {line_num}: {str(e)}")
+            return self._error_html(line_num, str(e))
     
-    def _generate_html_head(self):
-        """إنشاء رأس HTML"""
+    def _error_html(self, line_num: int, message: str) -> str:
+        return f'<div style="background: #f8d7da; color: #721c24; padding: 10px; margin: 5px 0; border-radius: 5px;">خطأ في السطر {line_num}: {message}</div>'
+    
+    def _generate_html_head(self, features=None):
+        """إنشاء رأس HTML
+        
+        features: العناصر والأصناف المستخدمة في الصفحة لتضمين قواعد CSS الأساسي
+        الخاصة بها فقط، أو None لتضمينه كاملاً
+        """
         title = self.metadata.get('title', 'White Language Output')
         description = self.metadata.get('description', '')
         
@@ -830,25 +2005,72 @@ class WhiteCompiler:
         if description:
             self.html_output.append(f'    <meta name="description" content="{description}">')
         
-        self.html_output.append('    <style>')
-        self.html_output.append(self._generate_base_css())
+        custom_styles = self.style_manager.custom_styles
+        if self.stylesheet_href:
+            # الأنماط الأساسية في ملف مشترك يخزنه المتصفح مرة واحدة لكل الصفحات
+            self.html_output.append(f'    <link rel="stylesheet" href="{self.stylesheet_href}">')
+            if custom_styles:
+                self.html_output.append('    <style>')
+        else:
+            self.html_output.append('    <style>')
+            self.html_output.append(self._generate_base_css(features))
         
         # إضافة الأنماط المخصصة
-        for selector, rules in self.style_manager.custom_styles.items():
-            self.html_output.append(f'        {selector} {{ {rules}; }}')
+        for selector, rules in custom_styles.items():
+            self.html_output.append(self._style_rule(selector, rules))
+        
+        if custom_styles or not self.stylesheet_href:
+            self.html_output.append('    </style>')
         
         self.html_output.extend([
-            '    </style>',
             '</head>',
             '<body>',
             '    <div class="container">'
         ])
     
-    def _generate_base_css(self) -> str:
+    def _theme_key(self) -> tuple:
+        """مفتاح إعدادات الثيم والألوان للذاكرات المشتركة بين المترجمات"""
+        return (json.dumps(self.theme_config, sort_keys=True, default=str),
+                tuple(self.style_manager.theme_colors.items()))
+    
+    def _generate_base_css(self, features=None) -> str:
+        """CSS الأساسي، يُبنى مرة واحدة لكل إعدادات ثيم وألوان ومجموعة ميزات"""
+        key = self._theme_key()
+        if features is not None:
+            rules = _BASE_CSS_RULES.get(key)
+            if rules is None:
+                entries, tail = _split_css(self._generate_base_css())
+                rules = _BASE_CSS_RULES[key] = (entries, tail, _css_features(entries))
+            features = frozenset(features) & rules[2]
+            key = (key, features)
+        
+        css = _BASE_CSS_CACHE.get(key)
+        if css is None:
+            if features is None:
+                css = self._build_base_css()
+            else:
+                css = ''.join(_shake_css(rules[0], features)) + rules[1]
+            _BASE_CSS_CACHE[key] = css
+        return css
+    
+    def _build_base_css(self) -> str:
         if self.theme_config.get('minimal_css', False):
-            return self._generate_minimal_css()
+            css = self._generate_minimal_css()
         else:
-            return self._generate_full_css()
+            css = self._generate_full_css()
+        return _minify_css(css) if self.theme_config.get('minify') else css
+    
+    def write_base_stylesheet(self, directory: str) -> str:
+        """كتابة CSS الأساسي مرة واحدة في ملف باسم مشتق من محتواه وإرجاع مساره"""
+        css = (self._generate_base_css() + '\n').encode('utf-8')
+        digest = hashlib.sha1(css).hexdigest()[:10]
+        path = os.path.join(directory, f"white-base.{digest}.css")
+        
+        if not os.path.exists(path):
+            write_if_changed(path, css)
+        
+        return path
+    
     def _generate_minimal_css(self) -> str:
         """Generate minimal base CSS - NO default colors, maximum user flexibility"""
         return '''        * { 
@@ -1225,26 +2447,6 @@ class WhiteCompiler:
                 }}
             }}'''
 
-    # Also update the __init__ method of WhiteCompiler class:
-    def __init__(self, theme_config=None):
-        self.style_manager = StyleManager()
-        self.variable_manager = VariableManager()
-        self.form_manager = FormManager()
-        self.table_manager = TableManager()
-        self.html_output = []
-        self.metadata = {'title': 'White Language Output'}
-        
-        # Add theme configuration support
-        self.theme_config = {
-            'minimal_css': False,  # Set to True for minimal CSS
-            'enable_gradients': True,
-            'enable_shadows': True,
-            'container_centered': True,
-        }
-        if theme_config:
-            self.theme_config.update(theme_config)
-        
-    
     def _generate_html_footer(self):
         self.html_output.extend([
             '    </div>',
@@ -1275,22 +2477,23 @@ class WhiteCompiler:
         return content
 
     # معالجات الأوامر الأساسية
-    def _handle_print(self, line: str) -> str:
-        content = self._extract_content(line, 'print')
+    def _parse_text_block(self, line: str):
+        """title / header / print / paragraph / div: نص مع خصائص أنماط"""
+        command = line.partition(' ')[0]
+        content = self._extract_content(line, command)
         content = self.variable_manager.replace_variables(content)
         content, style_attrs = self.style_manager.parse_style_attributes(content)
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<p{class_attr}>{content}</p>'
+        return (command, content, style_attrs)
     
-    def _handle_title(self, line: str) -> str:
-        content = self._extract_content(line, 'title')
-        content = self.variable_manager.replace_variables(content)
-        content, style_attrs = self.style_manager.parse_style_attributes(content)
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<h1{class_attr}>{content}</h1>'
+    def _render_text_block(self, node) -> str:
+        tag = self.TEXT_BLOCK_TAGS[node[0]]
+        class_attr = self.style_manager.generate_css_class(node[2])
+        return f'<{tag}{class_attr}>{node[1]}</{tag}>'
     
-    # In handle_form method, check if button is inside form context
-    def _handle_button(self, line: str) -> str:
+    def _render_text(self, node) -> str:
+        return f"<p>{node[1]}</p>"
+    
+    def _parse_button(self, line: str):
         content = self._extract_content(line, 'button')
         content = self.variable_manager.replace_variables(content)
         content, style_attrs = self.style_manager.parse_style_attributes(content)
@@ -1300,7 +2503,12 @@ class WhiteCompiler:
             button_type = "submit"
         elif 'type:reset' in line:
             button_type = "reset"
-
+        
+        return ('button', content, style_attrs, button_type)
+    
+    # In handle_form method, check if button is inside form context
+    def _render_button(self, node) -> str:
+        _, content, style_attrs, button_type = node
         class_attr = self.style_manager.generate_css_class(style_attrs)
         button_html = f'<button type="{button_type}"{class_attr}>{content}</button>'
         
@@ -1311,21 +2519,10 @@ class WhiteCompiler:
         
         return button_html
     
-    def _handle_header(self, line: str) -> str:
-        content = self._extract_content(line, 'header')
-        content = self.variable_manager.replace_variables(content)
-        content, style_attrs = self.style_manager.parse_style_attributes(content)
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<h2{class_attr}>{content}</h2>'
-    
-    def _handle_paragraph(self, line: str) -> str:
-        content = self._extract_content(line, 'paragraph')
-        content = self.variable_manager.replace_variables(content)
-        content, style_attrs = self.style_manager.parse_style_attributes(content)
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<p{class_attr}>{content}</p>'
-    
-    def _handle_link(self, line: str) -> str:
+    # روابط الصفحات لا تأخذ بصمة، فقط الملفات الثابتة مثل PDF والصور
+    _PAGE_LINK_RE = re.compile(r'\.(html?|white)(?:[?#]|$)', re.I)
+
+    def _parse_link(self, line: str):
         content = self._extract_content(line, 'link')
         content = self.variable_manager.replace_variables(content)
         content, style_attrs = self.style_manager.parse_style_attributes(content)
@@ -1334,17 +2531,27 @@ class WhiteCompiler:
             parts = content.split(' to ', 1)
             text = parts[0].strip().strip('"').strip("'")
             url = parts[1].strip().strip('"').strip("'")
-            
-            class_attr = self.style_manager.generate_css_class(style_attrs)
-            return f'<a href="{url}"{class_attr}>{text}</a>'
-        return ""
+            return ('link', text, url, style_attrs)
+        return None
     
-    def _handle_list(self, line: str) -> str:
+    def _render_link(self, node) -> str:
+        _, text, url, style_attrs = node
+        class_attr = self.style_manager.generate_css_class(style_attrs)
+        if self.fingerprint_assets and not self._PAGE_LINK_RE.search(url):
+            url = self._asset_url(url)
+        url = self._page_url(url)
+        return f'<a href="{url}"{class_attr}>{text}</a>'
+    
+    def _parse_list(self, line: str):
         content = self._extract_content(line, 'list')
         content = self.variable_manager.replace_variables(content)
         content, style_attrs = self.style_manager.parse_style_attributes(content)
         
         items = [item.strip().strip('"').strip("'") for item in content.split(',')]
+        return ('list', items, style_attrs)
+    
+    def _render_list(self, node) -> str:
+        _, items, style_attrs = node
         class_attr = self.style_manager.generate_css_class(style_attrs)
         
         list_html = [f'<ul{class_attr}>']
@@ -1355,69 +2562,1187 @@ class WhiteCompiler:
         
         return '\n'.join(list_html)
     
-    def _handle_code(self, line: str) -> str:
+    def _parse_code(self, line: str):
         content = self._extract_content(line, 'code')
         content, style_attrs = self.style_manager.parse_style_attributes(content)
         
         content = content.replace('\\n', '\n')
-        
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<pre{class_attr}><code>{content}</code></pre>'
+        return ('code', content, style_attrs)
     
-    def _handle_div(self, line: str) -> str:
-        content = self._extract_content(line, 'div')
-        content = self.variable_manager.replace_variables(content)
-        content, style_attrs = self.style_manager.parse_style_attributes(content)
-        class_attr = self.style_manager.generate_css_class(style_attrs)
-        return f'<div{class_attr}>{content}</div>'
+    def _render_code(self, node) -> str:
+        class_attr = self.style_manager.generate_css_class(node[2])
+        return f'<pre{class_attr}><code>{node[1]}</code></pre>'
+    
+    def _parse_var(self, line: str):
+        args = line.split()
+        var_name = args[1]
+        value = " ".join(args[3:]).strip("\"'")
+        self.variable_manager.set_variable(var_name, value)
+        return None
+    
+    def _parse_keyword(self, line: str):
+        """أوامر بلا معاملات مثل endtable و br: نوع العقدة هو الأمر نفسه"""
+        return (line,)
+    
+    def _render_raw(self, node) -> str:
+        """مخرجات أمر مخصص مع الأنماط التي أنشأها"""
+        _, html, styles = node
+        if styles:
+            self.style_manager.custom_styles.update(styles)
+        return html
+    
+    def _render_custom(self, node) -> str:
+        """أمر مخصص مسجل بـ render=True، مع المتغيرات كما كانت عند سطره"""
+        _, name, line, variables = node
+        self.variable_manager.variables = dict(variables)
+        return self._render_handlers[name](self, line)
+    
+    def _render_error(self, node) -> str:
+        return self._error_html(node[1], node[2])
     
     def _handle_meta(self, line: str):
         """معالجة metadata"""
+        item = self._parse_meta(line)
+        if item:
+            self.metadata[item[0]] = item[1]
+    
+    def _parse_meta(self, line: str):
         content = self._extract_content(line, 'meta')
         if '=' in content:
             key, value = content.split('=', 1)
             key = key.strip()
             value = value.strip().strip('"').strip("'")
-            self.metadata[key] = value
+            return key, value
+        return None
+    
+    # جدول الأوامر المدمجة: الاسم -> (دالة التحليل، مطابقة السطر كاملاً، يسمح بدمج span)
+    # أوامر الجداول والنماذج تسبق فحص دمج span كما في السلسلة الأصلية
+    BUILTIN_DIRECTIVES = {
+        'table': (_parse_table, False, False),
+        'tablerow': (_parse_tablerow, False, False),
+        'endtable': (_parse_keyword, True, False),
+        'include': (_parse_include, False, False),
+        'form': (_parse_form, False, False),
+        'input': (_parse_input, False, False),
+        'select': (_parse_select, False, False),
+        'textarea': (_parse_textarea, False, False),
+        'endform': (_parse_keyword, True, False),
+        'image': (_parse_image, False, True),
+        'span': (_parse_span, False, True),
+        'title': (_parse_text_block, False, True),
+        'button': (_parse_button, False, True),
+        'print': (_parse_text_block, False, True),
+        'header': (_parse_text_block, False, True),
+        'paragraph': (_parse_text_block, False, True),
+        'link': (_parse_link, False, True),
+        'list': (_parse_list, False, True),
+        'var': (_parse_var, False, True),
+        'code': (_parse_code, False, True),
+        'div': (_parse_text_block, False, True),
+        'br': (_parse_keyword, True, True),
+        'hr': (_parse_keyword, True, True),
+    }
+    
+    # عدد صفوف CSV في كل كتابة إلى الناتج في وضع البث
+    TABLE_FROM_BATCH_ROWS = 512
+    
+    TEXT_BLOCK_TAGS = {'title': 'h1', 'header': 'h2', 'print': 'p', 'paragraph': 'p', 'div': 'div'}
+    
+    # نوع العقدة -> دالة الإخراج
+    RENDERERS = {
+        'title': _render_text_block,
+        'header': _render_text_block,
+        'print': _render_text_block,
+        'paragraph': _render_text_block,
+        'div': _render_text_block,
+        'text': _render_text,
+        'button': _render_button,
+        'link': _render_link,
+        'list': _render_list,
+        'code': _render_code,
+        'image': _render_image,
+        'span': _render_span,
+        'spans': _render_spans,
+        'table': _render_table,
+        'tablerow': _render_tablerow,
+        'endtable': _render_endtable,
+        'tablefrom': _render_table_from,
+        'include': _render_include,
+        'form': _render_form,
+        'input': _render_input,
+        'select': _render_select,
+        'textarea': _render_textarea,
+        'endform': _render_endform,
+        'br': lambda self, node: "<br>",
+        'hr': lambda self, node: "<hr>",
+        'raw': _render_raw,
+        'custom': _render_custom,
+        'error': _render_error,
+    }
 
-def main():
-    """الدالة الرئيسية"""
-    print("White Language Compiler")
+def output_path(white_file: str) -> str:
+    """مسار ملف HTML المقابل لملف .white"""
+    return os.path.splitext(white_file)[0] + '.html'
+
+def _temp_path(path: str) -> str:
+    """اسم ملف مؤقت بجانب path، فريد لكل عملية و thread، للكتابة ثم os.replace"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """كتابة الملف بشكل ذري فقط إذا تغير محتواه، وإرجاع هل كُتب
     
-    search_path = "."
-    if len(sys.argv) > 1:
-        search_path = sys.argv[1]
+    الملفات غير المتغيرة يبقى وقت تعديلها كما هو فلا تعتبرها أدوات النشر معدلة
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as file:
+                if file.read() == data:
+                    return False
+    except OSError:
+        pass
     
-    compiler = WhiteCompiler()
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return True
+
+def _replace_if_changed(tmp_path: str, path: str) -> bool:
+    """نقل ملف مؤقت مكتمل إلى مكانه إذا اختلف عن الموجود، وإلا حذفه"""
+    try:
+        unchanged = filecmp.cmp(tmp_path, path, shallow=False)
+    except OSError:
+        unchanged = False
+    if unchanged:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+class _TeeWriter:
+    """كتابة نفس النص في عدة ملفات، مثل HTML ونسخته المضغوطة في وضع البث"""
+    def __init__(self, *sinks):
+        self.sinks = sinks
     
-    white_files = compiler.find_white_files(search_path)
+    def write(self, text: str):
+        for sink in self.sinks:
+            sink.write(text)
+
+def file_hash(filename: str) -> str:
+    """بصمة sha256 لمحتوى الملف"""
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+class BuildManifest:
+    """سجل البناء التزايدي: بصمة كل ملف مصدر مع بصمة كود المترجم وإعداداته
     
-    if not white_files:
-        print(f"couldn't find files")
-        return
+    يُسجل أيضاً لكل صفحة الملفات التي تعتمد عليها (include و CSV) مع بصمتها،
+    فتعديل ملف مضمن يعيد بناء الصفحات التي تستخدمه فقط.
+    """
+    FILENAME = '.white-cache.json'
+
+    def __init__(self, root: str, theme_config: dict, options: dict = None):
+        self.path = os.path.join(root, self.FILENAME)
+        self.root = root
+        # تمرير الإعدادات عبر JSON حتى تتطابق المقارنة مع النسخة المحفوظة
+        settings = {'theme_config': theme_config, 'options': options or {}}
+        self.settings = json.loads(json.dumps(settings, sort_keys=True))
+        self.files = {}
+        # آخر حجم ووقت تعديل وبصمة لكل ملف معتمد عليه لتجنب إعادة حساب البصمة
+        self.dependencies = {}
+        self._pending = {}
+        self._dependency_states = {}
+
+    def load(self):
+        """تحميل السجل السابق، وتجاهله إذا تغير كود المترجم أو الإعدادات"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        
+        if data.get('compiler') == COMPILER_FINGERPRINT and data.get('settings') == self.settings:
+            self.files = data.get('files', {})
+            self.dependencies = data.get('dependencies', {})
+
+    def _key(self, white_file: str) -> str:
+        return os.path.relpath(white_file, self.root).replace(os.sep, '/')
+
+    def _snapshot(self, filename: str, previous=None):
+        """الحجم ووقت التعديل والبصمة، مع إعادة استخدام البصمة السابقة إن لم يتغيرا"""
+        stat = os.stat(filename)
+        record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+            record['hash'] = previous['hash']
+        else:
+            record['hash'] = file_hash(filename)
+        return record
+
+    def _dependency_hash(self, key: str):
+        """بصمة ملف معتمد عليه الآن، أو None إذا لم يكن موجوداً (تُحسب مرة لكل بناء)"""
+        if key not in self._dependency_states:
+            try:
+                state = self.dependencies[key] = self._snapshot(os.path.join(self.root, key),
+                                                                self.dependencies.get(key))
+            except OSError:
+                state = None
+            self._dependency_states[key] = state
+        state = self._dependency_states[key]
+        return state and state['hash']
+
+    def is_fresh(self, white_file: str) -> bool:
+        """هل الملف ومخرجاته والملفات التي يعتمد عليها محدثة منذ آخر بناء؟"""
+        key = self._key(white_file)
+        entry = self.files.get(key)
+        record = self._snapshot(white_file, entry)
+        self._pending[key] = record
+        
+        output_file = output_path(white_file)
+        if not entry or entry.get('hash') != record['hash'] or not os.path.exists(output_file):
+            return False
+        if self.settings['options'].get('gzip') and not os.path.exists(output_file + '.gz'):
+            return False
+        
+        for dependency, recorded_hash in entry.get('deps', {}).items():
+            if self._dependency_hash(dependency) != recorded_hash:
+                return False
+        return True
+
+    def record(self, white_file: str, dependencies=None):
+        """تسجيل ملف تم بناؤه أو التحقق منه بنجاح
+        
+        dependencies: مسارات الملفات التي استخدمها البناء، أو None للإبقاء على السابقة
+        """
+        key = self._key(white_file)
+        record = self._pending.pop(key, None)
+        if record is None:
+            return
+        
+        if dependencies is None:
+            deps = self.files.get(key, {}).get('deps')
+        else:
+            # بصمة كل ملف كما استخدمه هذا البناء
+            deps = {}
+            for dependency in {self._key(dependency) for dependency in dependencies}:
+                self._dependency_states.pop(dependency, None)
+                deps[dependency] = self._dependency_hash(dependency)
+        if deps:
+            record['deps'] = deps
+        self.files[key] = record
+
+    def reset(self):
+        """نسيان حالات الاعتماديات المحسوبة قبل جولة بناء جديدة (وضع المراقبة)"""
+        self._dependency_states.clear()
+
+    def dependents(self) -> dict:
+        """الخريطة العكسية: ملف معتمد عليه -> الصفحات التي تستخدمه"""
+        dependents = {}
+        for key, entry in self.files.items():
+            for dependency in entry.get('deps', ()):
+                dependents.setdefault(dependency, []).append(key)
+        return dependents
+
+    def save(self):
+        """حفظ السجل بشكل ذري"""
+        self.files = {key: record for key, record in self.files.items()
+                      if os.path.exists(os.path.join(self.root, key))}
+        dependents = self.dependents()
+        self.dependencies = {key: self.dependencies[key] for key in dependents if key in self.dependencies}
+        data = {'version': __version__, 'compiler': COMPILER_FINGERPRINT, 'settings': self.settings,
+                'files': self.files, 'dependencies': self.dependencies, 'dependents': dependents}
+        write_if_changed(self.path, json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+class CompileProfiler:
+    """قياس زمن كل أمر وأبطأ الأسطر في كل ملف (وضع --profile)"""
+    SLOWEST_LINES = 5
+
+    def __init__(self):
+        self.timings = {}
+        self.slowest = {}
+        self.current_file = '<source>'
+        self._lock = threading.Lock()
+
+    def record(self, directive: str, seconds: float, line_num: int, line: str):
+        """تسجيل زمن تنفيذ سطر واحد"""
+        with self._lock:
+            self._record(directive, seconds, line_num, line)
+
+    def _record(self, directive: str, seconds: float, line_num: int, line: str):
+        timings = self.timings.get(directive)
+        if timings is None:
+            timings = self.timings[directive] = []
+        timings.append(seconds)
+        
+        slowest = self.slowest.setdefault(self.current_file, [])
+        entry = (seconds, line_num, line)
+        if len(slowest) < self.SLOWEST_LINES:
+            heapq.heappush(slowest, entry)
+        elif seconds > slowest[0][0]:
+            heapq.heapreplace(slowest, entry)
+
+    def state(self) -> dict:
+        """البيانات الخام لنقلها من العمليات الفرعية"""
+        return {'timings': self.timings, 'slowest': self.slowest}
+
+    def merge(self, state: dict):
+        """دمج بيانات مترجم آخر"""
+        for directive, timings in state['timings'].items():
+            self.timings.setdefault(directive, []).extend(timings)
+        for filename, entries in state['slowest'].items():
+            slowest = self.slowest.setdefault(filename, [])
+            for entry in entries:
+                heapq.heappush(slowest, tuple(entry))
+                if len(slowest) > self.SLOWEST_LINES:
+                    heapq.heappop(slowest)
+
+    def to_dict(self) -> dict:
+        """ملخص قابل للتحويل إلى JSON"""
+        directives = {}
+        for directive, timings in self.timings.items():
+            ordered = sorted(timings)
+            directives[directive] = {
+                'calls': len(ordered),
+                'total_ms': round(sum(ordered) * 1000, 3),
+                'p95_us': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 1),
+            }
+        
+        slowest_lines = {
+            filename: [{'line': line_num, 'us': round(seconds * 1e6, 1), 'source': line}
+                       for seconds, line_num, line in sorted(entries, reverse=True)]
+            for filename, entries in self.slowest.items()
+        }
+        return {'directives': directives, 'slowest_lines': slowest_lines}
+
+    def summary(self, limit: int = 10) -> str:
+        """جدول نصي مرتب حسب الزمن الكلي لكل أمر"""
+        data = self.to_dict()
+        rows = [f"{'directive':<20} {'calls':>9} {'total ms':>11} {'mean us':>9} {'p95 us':>9}"]
+        for directive, stats in sorted(data['directives'].items(), key=lambda item: -item[1]['total_ms']):
+            mean_us = stats['total_ms'] * 1000 / stats['calls']
+            rows.append(f"{directive:<20} {stats['calls']:>9} {stats['total_ms']:>11.2f} "
+                        f"{mean_us:>9.1f} {stats['p95_us']:>9.1f}")
+        
+        slowest = sorted(((seconds, filename, line_num, line)
+                          for filename, entries in self.slowest.items()
+                          for seconds, line_num, line in entries), reverse=True)[:limit]
+        if slowest:
+            rows.append('')
+            rows.append('slowest lines:')
+            for seconds, filename, line_num, line in slowest:
+                rows.append(f"  {seconds * 1e6:9.1f} us  {filename}:{line_num}  {line[:60]}")
+        return '\n'.join(rows)
+
+def build_file(white_file: str, theme_config=None, options=None, profiler=None,
+               dependencies=None, compiler=None) -> str:
+    """تحويل ملف واحد وكتابة ملف HTML الناتج
     
-    print(f"a file is found {len(white_files)} :")
-    for i, file in enumerate(white_files, 1):
-        print(f"   {i}. {file}")
-    print()
+    options: خيارات البناء، مثل stream لكتابة الناتج أثناء القراءة
+    و stylesheet لمسار ملف CSS الأساسي المشترك و ir_cache لمجلد IR المحفوظ
+    و gzip لمستوى ضغط نسخة .html.gz بجانب الناتج و image_cache لملف أبعاد الصور
+    و fingerprint لربط الملفات المحلية بنسخها ذات البصمة و asset_cache لملف البصمات
+    dependencies: مجموعة تُضاف إليها الملفات المضمنة وملفات CSV والصور المستخدمة
+    compiler: مترجم يُعاد استخدامه بين الملفات، مثل watch، وإلا يُنشأ مترجم جديد
+    """
+    options = options or {}
+    compiler = compiler or WhiteCompiler(theme_config)
+    if profiler is not None:
+        profiler.current_file = white_file
+        compiler.enable_profiling(profiler)
     
-    for white_file in white_files:
+    print(f"processing: {white_file}")
+    
+    output_file = output_path(white_file)
+    
+    compiler.ir_cache_dir = options.get('ir_cache')
+    
+    if options.get('image_cache'):
+        IMAGE_SIZES.load(options['image_cache'])
+    
+    compiler.fingerprint_assets = bool(options.get('fingerprint'))
+    if compiler.fingerprint_assets:
+        if options.get('asset_cache'):
+            ASSET_FINGERPRINTS.load(options['asset_cache'])
+    
+    # الرابط نسبي لمجلد كل صفحة فيُحسب في كل مرة حتى مع مترجم مشترك
+    compiler.stylesheet_href = None
+    if options.get('stylesheet'):
+        href = os.path.relpath(options['stylesheet'], os.path.dirname(os.path.abspath(output_file)))
+        compiler.stylesheet_href = href.replace(os.sep, '/')
+    
+    gzip_level = options.get('gzip')
+    outputs = [output_file, output_file + '.gz'] if gzip_level else [output_file]
+    
+    if options.get('stream'):
+        # الكتابة في ملفات مؤقتة ثم استبدال المتغير منها فقط
+        print(f"parsing {white_file}")
+        tmp_paths = [_temp_path(path) for path in outputs]
+        try:
+            with open(white_file, 'r', encoding='utf-8') as source, \
+                    open(tmp_paths[0], 'w', encoding='utf-8') as sink, \
+                    contextlib.ExitStack() as stack:
+                if gzip_level:
+                    # mtime=0 وبدون اسم ملف حتى يكون الملف المضغوط ثابتاً لنفس المحتوى
+                    compressed = stack.enter_context(gzip.GzipFile(
+                        '', 'wb', gzip_level, stack.enter_context(open(tmp_paths[1], 'wb')), mtime=0))
+                    sink = _TeeWriter(sink, stack.enter_context(io.TextIOWrapper(compressed, encoding='utf-8')))
+                compiler.compile_stream(source, sink, os.path.dirname(white_file))
+        except BaseException:
+            for tmp_path in tmp_paths:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+            raise
+        changed = [_replace_if_changed(tmp_path, path) for tmp_path, path in zip(tmp_paths, outputs)]
+    else:
+        # بدون parse_file حتى لا تتحول أخطاء القراءة إلى صفحة خطأ تُحسب ناجحة
+        with open(white_file, 'r', encoding='utf-8') as file:
+            source = file.read()
+        print(f"parsing {white_file}")
+        data = compiler.compile_to_html(source, os.path.dirname(white_file)).encode('utf-8')
+        changed = [write_if_changed(output_file, data)]
+        if gzip_level:
+            changed.append(write_if_changed(outputs[1], gzip.compress(data, gzip_level, mtime=0)))
+    
+    if dependencies is not None:
+        dependencies.update(compiler.context.dependencies)
+    
+    print(f"created {output_file}" if any(changed) else f"unchanged {output_file}")
+    return output_file
+
+def save_caches(options: dict):
+    """حفظ جداول أبعاد الصور وبصمات الملفات وكتابة asset-manifest.json"""
+    IMAGE_SIZES.save()
+    if options.get('asset_manifest'):
+        ASSET_FINGERPRINTS.write_manifest(options['asset_manifest'], os.path.dirname(options['asset_manifest']))
+    ASSET_FINGERPRINTS.save()
+
+def _build_one(white_file: str, theme_config=None, options=None, profiler=None,
+               dependencies=None, compiler=None) -> bool:
+    """بناء ملف مع طباعة الخطأ بدلاً من رفعه"""
+    try:
+        build_file(white_file, theme_config, options, profiler, dependencies, compiler)
+        return True
+    except Exception as e:
+        print(f"error{str(e)}")
+        return False
+
+def _build_worker(white_file: str, theme_config=None, options=None):
+    """تنفيذ البناء داخل عملية فرعية مع حجز المخرجات لطباعتها بالترتيب"""
+    profiler = CompileProfiler() if options and options.get('profile') else None
+    log = io.StringIO()
+    dependencies = set()
+    with contextlib.redirect_stdout(log):
+        ok = _build_one(white_file, theme_config, options, profiler, dependencies)
+    return {'ok': ok, 'log': log.getvalue(), 'profile': profiler.state() if profiler else None,
+            'dependencies': sorted(dependencies), 'images': IMAGE_SIZES.take_updates(),
+            'assets': ASSET_FINGERPRINTS.take_updates()}
+
+def _hash_assets(white_files: list, theme_config=None, options=None):
+    """بصمات كل الملفات التي تشير إليها الصفحات، قبل توزيعها على العمليات
+    
+    يُحفظ IR الصفحات في ir_cache فلا تعيد العمليات الفرعية تحليلها.
+    """
+    compiler = WhiteCompiler(theme_config)
+    compiler.ir_cache_dir = options.get('ir_cache')
+    paths = set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for white_file in white_files:
+            # أخطاء الصفحة تظهر عند بنائها
+            with contextlib.suppress(OSError, ValueError):
+                paths.update(compiler.asset_paths(white_file))
+    for path in sorted(paths):
+        with contextlib.suppress(OSError):
+            ASSET_FINGERPRINTS.digest(path)
+
+def _init_worker(asset_entries: dict):
+    """بداية كل عملية فرعية: البصمات المحسوبة في العملية الرئيسية"""
+    ASSET_FINGERPRINTS.entries.update(asset_entries)
+
+def build_files(white_files: list, theme_config=None, jobs: int = 1, manifest=None, options=None,
+                profiler=None) -> int:
+    """بناء قائمة ملفات بالتتابع أو عبر مجموعة عمليات، وإرجاع عدد الأخطاء"""
+    failures = 0
+    
+    if jobs == 1 or len(white_files) < 2:
+        for white_file in white_files:
+            dependencies = set()
+            if _build_one(white_file, theme_config, options, profiler, dependencies):
+                if manifest:
+                    manifest.record(white_file, dependencies)
+            else:
+                failures += 1
+            print()
+        return failures
+    
+    if options and options.get('fingerprint'):
+        # حساب بصمات الملفات المشتركة هنا مرة واحدة بدلاً من مرة في كل عملية فرعية
+        _hash_assets(white_files, theme_config, options)
+    
+    # تُحمّل فقط عند البناء المتوازي حتى يبقى تشغيل ملف واحد سريعاً
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # توزيع الملفات على دفعات لتقليل كلفة الاتصال بين العمليات
+    chunksize = max(1, len(white_files) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(ASSET_FINGERPRINTS.entries,)) as executor:
+        results = executor.map(_build_worker, white_files, itertools.repeat(theme_config),
+                               itertools.repeat(options), chunksize=chunksize)
+        for white_file, result in zip(white_files, results):
+            sys.stdout.write(result['log'])
+            if profiler is not None and result['profile']:
+                profiler.merge(result['profile'])
+            IMAGE_SIZES.merge(result['images'])
+            ASSET_FINGERPRINTS.merge(result['assets'])
+            if result['ok']:
+                if manifest:
+                    manifest.record(white_file, result['dependencies'])
+            else:
+                failures += 1
+            print()
+    
+    return failures
+
+def watch(path: str, theme_config=None, manifest=None, interval: float = 0.3, options=None,
+          recursive: bool = False, include=None, exclude=None) -> int:
+    """مراقبة ملفات .white وإعادة بناء الملفات المعدلة فقط
+    
+    مترجم واحد طوال المراقبة فتبقى ذاكرة تحويل CSS دافئة بين إعادات البناء،
+    وكل ترجمة تبدأ سياقاً جديداً فلا تنتقل حالة صفحة إلى أخرى.
+    """
+    compiler = WhiteCompiler(theme_config)
+    
+    def scan():
+        white_files, directories = compiler._scan_white_files(path, recursive, include, exclude)
+        return white_files, {directory: dir_snapshot(directory) for directory in directories}
+    
+    def dir_snapshot(directory):
         try:
-            print(f"processing: {white_file}")
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+    
+    def snapshot(white_file):
+        try:
+            stat = os.stat(white_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def dependency_snapshots():
+        # الملفات المضمنة وملفات CSV المسجلة في manifest مع الصفحات التي تستخدمها
+        if not manifest:
+            return {}
+        return {os.path.join(manifest.root, dependency): (snapshot(os.path.join(manifest.root, dependency)), pages)
+                for dependency, pages in manifest.dependents().items()}
+    
+    white_files, dir_mtimes = scan()
+    states = {white_file: snapshot(white_file) for white_file in white_files}
+    dependency_states = dependency_snapshots()
+    
+    print(f"watching {path} ({len(white_files)} files), press Ctrl+C to stop")
+    
+    try:
+        while True:
+            time.sleep(interval)
             
-            html_output = compiler.parse_file(white_file)
+            # إعادة البحث عن الملفات فقط عند تغير محتوى أحد المجلدات (إضافة أو حذف)
+            if any(dir_snapshot(directory) != mtime for directory, mtime in dir_mtimes.items()):
+                white_files, dir_mtimes = scan()
+                states = {white_file: states.get(white_file) for white_file in white_files}
             
-            output_file = white_file.replace('.white', '.html')
+            changed = []
+            for white_file in white_files:
+                state = snapshot(white_file)
+                if state is not None and state != states[white_file]:
+                    states[white_file] = state
+                    changed.append(white_file)
             
-            with open(output_file, 'w', encoding='utf-8') as file:
-                file.write(html_output)
+            # إعادة بناء الصفحات التي تستخدم ملفاً مضمناً أو CSV تم تعديله
+            changed_pages = set()
+            for dependency, (state, pages) in dependency_states.items():
+                if snapshot(dependency) != state:
+                    changed_pages.update(pages)
+            if changed_pages:
+                for white_file in white_files:
+                    if white_file not in changed and manifest._key(white_file) in changed_pages:
+                        changed.append(white_file)
             
-            print(f"created {output_file}")
-                        
+            if changed and manifest:
+                manifest.reset()
+            
+            for white_file in changed:
+                # تجاهل الملفات التي تغير وقت تعديلها دون محتواها
+                if manifest and manifest.is_fresh(white_file):
+                    manifest.record(white_file)
+                    continue
+                
+                started = time.perf_counter()
+                dependencies = set()
+                if _build_one(white_file, theme_config, options, dependencies=dependencies,
+                              compiler=compiler) and manifest:
+                    manifest.record(white_file, dependencies)
+                print(f"rebuilt {white_file} in {(time.perf_counter() - started) * 1000:.1f} ms")
+            
+            if changed and manifest:
+                manifest.save()
+                dependency_states = dependency_snapshots()
+            if changed:
+                save_caches(options)
+    except KeyboardInterrupt:
+        print("stopped watching")
+    
+    return 0
+
+class PageCache:
+    """ذاكرة LRU محدودة الحجم بالبايت للصفحات المترجمة
+    
+    المفتاح (المسار، وقت التعديل) فأي تعديل على الملف يعطي مفتاحاً جديداً
+    ويُحذف الإدخال القديم عند إضافة الجديد.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._keys = {}
+    
+    def get(self, path: str, mtime_ns: int):
+        entry = self._entries.get((path, mtime_ns))
+        if entry is not None:
+            self._entries.move_to_end((path, mtime_ns))
+        return entry
+    
+    def put(self, path: str, mtime_ns: int, entry):
+        old_key = self._keys.get(path)
+        if old_key is not None:
+            self.size -= len(self._entries.pop(old_key)[0])
+        
+        body = entry[0]
+        if len(body) > self.max_bytes:
+            self._keys.pop(path, None)
+            return
+        
+        key = self._keys[path] = (path, mtime_ns)
+        self._entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            (old_path, _), old_entry = self._entries.popitem(last=False)
+            del self._keys[old_path]
+            self.size -= len(old_entry[0])
+
+class PageServer:
+    """خادم HTTP بسيط مبني على asyncio يترجم ملفات .white عند الطلب
+    
+    الترجمة تتم في ThreadPoolExecutor بمترجم واحد مشترك، والنتائج تحفظ في
+    PageCache فالصفحات المطلوبة كثيراً تُرسل من الذاكرة دون إعادة ترجمة.
+    """
+    STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 500: 'Internal Server Error'}
+    
+    def __init__(self, root: str, theme_config=None, cache_bytes: int = 64 * 1024 * 1024,
+                 jobs: int = None, ir_cache=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self.root = os.path.realpath(root)
+        self.compiler = WhiteCompiler(theme_config)
+        self.compiler.ir_cache_dir = ir_cache
+        self.cache = PageCache(cache_bytes)
+        self.executor = ThreadPoolExecutor(jobs)
+        self._pending = {}
+    
+    def resolve(self, url_path: str):
+        """تحويل مسار الطلب إلى ملف داخل المجلد الجذر أو None"""
+        relative = urllib.parse.unquote(url_path).lstrip('/')
+        if not relative or relative.endswith('/'):
+            relative += 'index.html'
+        
+        filename = os.path.realpath(os.path.join(self.root, relative))
+        if filename != self.root and not filename.startswith(self.root + os.sep):
+            return None
+        
+        # /page و /page.html تترجم page.white إن وجد
+        base, ext = os.path.splitext(filename)
+        if ext in ('.html', ''):
+            if os.path.isfile(base + '.white'):
+                return base + '.white'
+            if not ext and os.path.isdir(filename):
+                return self.resolve(url_path.rstrip('/') + '/')
+        return filename if os.path.isfile(filename) else None
+    
+    def load(self, filename: str):
+        """ترجمة ملف .white أو قراءة ملف ثابت
+        
+        يُرجع (المحتوى، ETag، النوع، الاعتماديات) حيث الاعتماديات ملفات include
+        و CSV مع وقت تعديلها
+        """
+        dependencies = ()
+        if filename.endswith('.white'):
+            with open(filename, 'r', encoding='utf-8') as file:
+                source = file.read()
+            started = time.perf_counter()
+            body = self.compiler.compile_to_html(source, os.path.dirname(filename)).encode('utf-8')
+            dependencies = _dependency_mtimes(self.compiler.context.dependencies)
+            print(f"compiled {os.path.relpath(filename, self.root)} in "
+                  f"{(time.perf_counter() - started) * 1000:.1f} ms")
+            content_type = 'text/html; charset=utf-8'
+        else:
+            import mimetypes
+            with open(filename, 'rb') as file:
+                body = file.read()
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        return body, etag, content_type, dependencies
+    
+    async def get_page(self, filename: str):
+        """الصفحة من الذاكرة أو ترجمتها مرة واحدة مهما تعددت الطلبات المتزامنة"""
+        import asyncio
+        mtime_ns = os.stat(filename).st_mtime_ns
+        entry = self.cache.get(filename, mtime_ns)
+        if entry is not None and _dependencies_fresh(entry[3]):
+            return entry
+        
+        key = (filename, mtime_ns)
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.run_in_executor(self.executor, self.load, filename)
+            try:
+                entry = await future
+            finally:
+                del self._pending[key]
+            self.cache.put(filename, mtime_ns, entry)
+            return entry
+        return await asyncio.shield(future)
+    
+    async def respond(self, method: str, target: str, headers: dict):
+        """إرجاع (الحالة، الترويسات، المحتوى) لطلب واحد"""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        
+        try:
+            filename = self.resolve(urllib.parse.urlsplit(target).path)
+        except ValueError:
+            # مسار غير صالح لنظام الملفات، مثل %00
+            return 400, {'Content-Type': 'text/plain; charset=utf-8'}, b'bad request'
+        if filename is None:
+            return 404, {'Content-Type': 'text/plain; charset=utf-8'}, b'not found'
+        
+        try:
+            body, etag, content_type, _ = await self.get_page(filename)
+        except FileNotFoundError:
+            return 404, {'Content-Type': 'text/plain; charset=utf-8'}, b'not found'
         except Exception as e:
-            print(f"error{str(e)}")
+            print(f"couldn't serve {filename}: {e}")
+            return 500, {'Content-Type': 'text/plain; charset=utf-8'}, str(e).encode('utf-8')
         
-        print()
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if_none_match = headers.get('if-none-match', '')
+        if etag in if_none_match or if_none_match.strip() == '*':
+            return 304, response_headers, b''
+        
+        response_headers['Content-Type'] = content_type
+        return 200, response_headers, body
+    
+    async def handle(self, reader, writer):
+        """معالجة اتصال واحد مع دعم keep-alive"""
+        import asyncio
+        try:
+            while True:
+                headers = {}
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    
+                    while True:
+                        header = await reader.readline()
+                        if header in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = header.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # سطر أطول من حد StreamReader: رد 400 ثم إغلاق الاتصال
+                    request_line = b''
+                
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    method = ''
+                    status, response_headers, body = 400, {}, b''
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, response_headers, body = await self.respond(method, target, headers)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = (connection == 'keep-alive' if version == 'HTTP/1.0'
+                                  else connection != 'close')
+                
+                head = [f"HTTP/1.1 {status} {self.STATUS_TEXT[status]}"]
+                response_headers['Content-Length'] = str(len(body))
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+                head.extend(f"{name}: {value}" for name, value in response_headers.items())
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD' and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def run(self, host: str, port: int):
+        import asyncio
+        server = await asyncio.start_server(self.handle, host, port)
+        address = server.sockets[0].getsockname()
+        print(f"serving {self.root} on http://{address[0]}:{address[1]}/, press Ctrl+C to stop")
+        async with server:
+            await server.serve_forever()
+
+def serve(path: str = '.', host: str = '127.0.0.1', port: int = 8000, theme_config=None,
+          cache_bytes: int = 64 * 1024 * 1024, jobs: int = None, ir_cache=None) -> int:
+    """ترجمة ملفات .white عند الطلب وإرسالها عبر HTTP"""
+    # asyncio و socket و mimetypes تُحمّل في أوضاع الخادم فقط لأنها تبطئ تشغيل البناء
+    import asyncio
+    server = PageServer(path, theme_config, cache_bytes, jobs, ir_cache)
+    try:
+        asyncio.run(server.run(host, port))
+    except KeyboardInterrupt:
+        print("stopped serving")
+    finally:
+        server.executor.shutdown(wait=False)
+    return 0
+
+def serve_main(argv) -> int:
+    """سطر الأوامر لوضع compiler.py serve"""
+    parser = argparse.ArgumentParser(prog='compiler.py serve',
+                                     description="ترجمة ملفات .white عند الطلب عبر HTTP")
+    parser.add_argument('path', nargs='?', default='.', help="المجلد الجذر للموقع")
+    parser.add_argument('--host', default='127.0.0.1', help="عنوان الاستماع")
+    parser.add_argument('-p', '--port', type=int, default=8000, help="منفذ الاستماع")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="عدد threads الترجمة (0 = عدد المعالجات)")
+    parser.add_argument('--cache-mb', type=float, default=64,
+                        help="الحجم الأقصى لذاكرة الصفحات بالميغابايت")
+    parser.add_argument('--no-ir-cache', action='store_true',
+                        help="عدم حفظ نتائج التحليل (IR) في .white-cache/ir")
+    parser.add_argument('--minify', action='store_true',
+                        help="إخراج HTML و CSS مضغوط بلا مسافات بادئة وأسطر")
+    args = parser.parse_args(argv)
+    
+    ir_cache = None
+    if not args.no_ir_cache:
+        ir_cache = os.path.abspath(os.path.join(args.path, '.white-cache', 'ir'))
+    
+    theme_config = {'minify': True} if args.minify else None
+    return serve(args.path, args.host, args.port, theme_config, int(args.cache_mb * 1024 * 1024),
+                 jobs=args.jobs or None, ir_cache=ir_cache)
+
+def default_socket_path() -> str:
+    """مسار socket الخادم الدائم: WHITE_SOCKET أو ملف خاص بالمستخدم في مجلد tmp"""
+    return os.environ.get('WHITE_SOCKET') or os.path.join(
+        os.environ.get('TMPDIR', '/tmp'), f"white-{os.getuid()}.sock")
+
+class CompileDaemon:
+    """خادم ترجمة دائم على Unix socket يبقي مترجمات WhiteCompiler جاهزة
+    
+    يتجنب كلفة تشغيل Python وتحميل الوحدة لكل ملف. البروتوكول سطر JSON لكل طلب
+    وسطر JSON لكل رد، ويمكن إرسال عدة طلبات في نفس الاتصال:
+    
+        {"path": "/abs/page.white"}                -> {"ok": true, "output": "...", "changed": true}
+        {"path": "...", "write": false}            -> {"ok": true, "html": "..."}
+        {"source": "...", "base_dir": "/abs"}      -> {"ok": true, "html": "..."}
+        {"op": "ping"} و {"op": "shutdown"}
+    
+    minify: true في أي طلب يستخدم مترجم الوضع المضغوط.
+    """
+    # أقصى حجم لسطر طلب واحد (يشمل نص المصدر)
+    MAX_REQUEST_BYTES = 64 * 1024 * 1024
+    
+    def __init__(self, socket_path: str, jobs: int = None, ir_cache=None):
+        self.socket_path = socket_path
+        self.ir_cache = ir_cache
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(jobs)
+        self.compilers = {}
+        self.requests = 0
+        self._stopped = None
+    
+    def compiler(self, minify: bool) -> WhiteCompiler:
+        """المترجم الجاهز لهذا الوضع (يُنشأ عند أول طلب)"""
+        compiler = self.compilers.get(minify)
+        if compiler is None:
+            compiler = self.compilers[minify] = WhiteCompiler({'minify': True} if minify else None)
+            compiler.ir_cache_dir = self.ir_cache
+        return compiler
+    
+    def execute(self, request: dict) -> dict:
+        """تنفيذ طلب ترجمة واحد داخل thread"""
+        started = time.perf_counter()
+        compiler = self.compiler(bool(request.get('minify')))
+        
+        if 'source' in request:
+            html_text = compiler.compile_to_html(request['source'], request.get('base_dir'))
+            response = {'ok': True, 'html': html_text}
+        else:
+            filename = os.path.abspath(request['path'])
+            with open(filename, 'r', encoding='utf-8') as file:
+                source = file.read()
+            html_text = compiler.compile_to_html(source, os.path.dirname(filename))
+            if request.get('write', True):
+                output_file = output_path(filename)
+                response = {'ok': True, 'output': output_file,
+                            'changed': write_if_changed(output_file, html_text.encode('utf-8'))}
+            else:
+                response = {'ok': True, 'html': html_text}
+        
+        response['ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return response
+    
+    async def respond(self, line: bytes) -> dict:
+        import asyncio
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {'ok': False, 'error': f"bad request: {e}"}
+        
+        op = request.get('op', 'compile')
+        if op == 'ping':
+            return {'ok': True, 'version': __version__, 'pid': os.getpid(), 'requests': self.requests}
+        if op == 'shutdown':
+            self._stopped.set()
+            return {'ok': True}
+        if op != 'compile' or ('path' not in request and 'source' not in request):
+            return {'ok': False, 'error': "expected path or source"}
+        
+        self.requests += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.execute, request)
+        except Exception as e:
+            return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    
+    async def handle(self, reader, writer):
+        """معالجة اتصال واحد: طلب في كل سطر والردود بنفس الترتيب"""
+        import asyncio
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # لا يمكن معرفة بداية الطلب التالي بعد سطر أطول من الحد
+                    response = {'ok': False, 'error': f"request line exceeds {self.MAX_REQUEST_BYTES} bytes"}
+                    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.respond(line)
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+                if self._stopped.is_set():
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # الاتصالات المفتوحة عند إيقاف الخادم تُغلق بهدوء
+            pass
+        finally:
+            writer.close()
+    
+    def _running(self) -> bool:
+        """هل يوجد خادم آخر يستمع على نفس المسار؟"""
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(self.socket_path)
+            except OSError:
+                return False
+        return True
+    
+    async def run(self) -> int:
+        import asyncio
+        if self._running():
+            print(f"a daemon is already listening on {self.socket_path}")
+            return 1
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+        
+        self._stopped = asyncio.Event()
+        # الـ socket يسمح بكتابة ملفات باسم المستخدم، فيُنشأ بصلاحيات المالك فقط
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self.handle, self.socket_path,
+                                                   limit=self.MAX_REQUEST_BYTES)
+        finally:
+            os.umask(umask)
+        
+        print(f"compile daemon listening on {self.socket_path}, press Ctrl+C to stop")
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+        print("daemon stopped")
+        return 0
+
+def daemon(socket_path: str = None, jobs: int = None, ir_cache=None) -> int:
+    """تشغيل خادم الترجمة الدائم حتى طلب shutdown أو Ctrl+C"""
+    import asyncio
+    server = CompileDaemon(socket_path or default_socket_path(), jobs, ir_cache)
+    try:
+        return asyncio.run(server.run())
+    except KeyboardInterrupt:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(server.socket_path)
+        print("daemon stopped")
+        return 0
+    finally:
+        server.executor.shutdown(wait=False)
+
+def daemon_main(argv) -> int:
+    """سطر الأوامر لوضع compiler.py daemon"""
+    parser = argparse.ArgumentParser(prog='compiler.py daemon',
+                                     description="خادم ترجمة دائم على Unix socket (العميل: white_client.py)")
+    parser.add_argument('--socket', help="مسار الـ socket (الافتراضي WHITE_SOCKET أو /tmp/white-<uid>.sock)")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="عدد threads الترجمة (0 = عدد المعالجات)")
+    parser.add_argument('--ir-cache', metavar='DIR',
+                        help="مجلد حفظ نتائج التحليل (IR)، مثل .white-cache/ir")
+    args = parser.parse_args(argv)
+    
+    ir_cache = os.path.abspath(args.ir_cache) if args.ir_cache else None
+    return daemon(args.socket, jobs=args.jobs or None, ir_cache=ir_cache)
+
+def main(argv=None):
+    """الدالة الرئيسية"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'serve':
+        return serve_main(argv[1:])
+    if argv and argv[0] == 'daemon':
+        return daemon_main(argv[1:])
+    
+    parser = argparse.ArgumentParser(description="White Language Compiler")
+    parser.add_argument('path', nargs='?', default='.', help="ملف .white أو مجلد يحتوي ملفات .white")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="عدد العمليات المتوازية (0 = عدد المعالجات)")
+    parser.add_argument('--force', action='store_true',
+                        help=f"إعادة بناء كل الملفات وتجاهل {BuildManifest.FILENAME} و IR المحفوظ")
+    parser.add_argument('--watch', action='store_true',
+                        help="البقاء في وضع المراقبة وإعادة بناء الملفات المعدلة فقط")
+    parser.add_argument('--interval', type=float, default=0.3,
+                        help="الفاصل الزمني بالثواني بين فحوصات وضع المراقبة")
+    parser.add_argument('--minify', action='store_true',
+                        help="إخراج HTML و CSS مضغوط بلا مسافات بادئة وأسطر")
+    parser.add_argument('--stream', action='store_true',
+                        help="كتابة HTML أثناء قراءة المصدر دون تحميل الملف كاملاً في الذاكرة")
+    parser.add_argument('--gzip', action='store_true',
+                        help="كتابة نسخة .html.gz مضغوطة مسبقاً بجانب كل صفحة")
+    parser.add_argument('--gzip-level', type=int, default=9, choices=range(1, 10), metavar='LEVEL',
+                        help="مستوى ضغط --gzip من 1 إلى 9 (الافتراضي 9)")
+    parser.add_argument('--external-css', action='store_true',
+                        help="كتابة CSS الأساسي مرة واحدة في white-base.<hash>.css وربطه من كل صفحة")
+    parser.add_argument('--fingerprint-assets', action='store_true',
+                        help=f"ربط الصور والملفات المحلية بنسخ name.<hash>.ext وكتابة {ASSET_MANIFEST}")
+    parser.add_argument('--profile', action='store_true',
+                        help="قياس زمن كل أمر وطباعة ملخص في النهاية")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="حفظ نتائج القياس بصيغة JSON (يفعّل --profile)")
+    parser.add_argument('--no-ir-cache', action='store_true',
+                        help="عدم حفظ نتائج التحليل (IR) في .white-cache/ir")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="البحث في المجلدات الفرعية أيضاً")
+    parser.add_argument('--include', action='append', metavar='PATTERN',
+                        help="بناء الملفات المطابقة لهذا النمط فقط (يمكن تكراره)")
+    parser.add_argument('--exclude', action='append', metavar='PATTERN',
+                        help="تخطي الملفات والمجلدات المطابقة لهذا النمط (يمكن تكراره)")
+    args = parser.parse_args(argv)
+    
+    print("White Language Compiler")
+    
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
+    options = {'stream': args.stream}
+    if args.gzip:
+        options['gzip'] = args.gzip_level
+    if args.fingerprint_assets:
+        options['fingerprint'] = True
+    profiler = CompileProfiler() if args.profile or args.profile_json else None
+    
+    theme_config = {'minify': True} if args.minify else None
+    compiler = WhiteCompiler(theme_config)
+    
+    white_files = compiler.find_white_files(args.path, args.recursive, args.include, args.exclude)
+    
+    if not white_files and not args.watch:
+        print(f"couldn't find files")
+        return 0
+    
+    root = args.path if os.path.isdir(args.path) else (os.path.dirname(args.path) or '.')
+    
+    if args.external_css:
+        options['stylesheet'] = os.path.abspath(compiler.write_base_stylesheet(root))
+    
+    manifest = BuildManifest(root, compiler.theme_config, options)
+    if not args.force:
+        manifest.load()
+    
+    print(f"a file is found {len(white_files)} :")
+    
+    stale_files = []
+    for white_file in white_files:
+        if manifest.is_fresh(white_file):
+            manifest.record(white_file)
+        else:
+            stale_files.append(white_file)
+    
+    for i, file in enumerate(stale_files, 1):
+        print(f"   {i}. {file}")
+    if len(stale_files) < len(white_files):
+        print(f"up to date: {len(white_files) - len(stale_files)}")
+    print()
+    
+    # خيارات لا تغير الناتج ولا تُسجل في manifest
+    build_options = dict(options, profile=profiler is not None)
+    ir_cache = os.path.abspath(os.path.join(root, '.white-cache', 'ir'))
+    if args.force:
+        # --force يعيد التحليل أيضاً بدلاً من استخدام IR المحفوظ
+        shutil.rmtree(ir_cache, ignore_errors=True)
+    if not args.no_ir_cache:
+        build_options['ir_cache'] = ir_cache
+    build_options['image_cache'] = os.path.abspath(os.path.join(root, '.white-cache', 'images.json'))
+    IMAGE_SIZES.load(build_options['image_cache'])
+    if args.fingerprint_assets:
+        build_options['asset_cache'] = os.path.abspath(os.path.join(root, '.white-cache', 'assets.json'))
+        build_options['asset_manifest'] = os.path.join(root, ASSET_MANIFEST)
+        ASSET_FINGERPRINTS.load(build_options['asset_cache'])
+    
+    failures = build_files(stale_files, theme_config, jobs=jobs, manifest=manifest,
+                           options=build_options, profiler=profiler)
+    manifest.save()
+    save_caches(build_options)
+    if not args.no_ir_cache:
+        prune_ir_cache(ir_cache, max(IR_CACHE_MIN_ENTRIES, 2 * len(white_files)))
+    
+    if profiler is not None:
+        print(profiler.summary())
+        if args.profile_json:
+            with open(args.profile_json, 'w', encoding='utf-8') as file:
+                json.dump(profiler.to_dict(), file, ensure_ascii=False, indent=2)
+    
+    if args.watch:
+        return watch(args.path, theme_config, manifest=manifest, interval=args.interval, options=build_options,
+                     recursive=args.recursive, include=args.include, exclude=args.exclude)
+    
+    return 1 if failures else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
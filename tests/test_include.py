@@ -0,0 +1,65 @@
+"""اختبارات include: روابط الأجزاء المضمنة ومفتاح ذاكرة الأجزاء
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiler
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
+class IncludeTest(unittest.TestCase):
+    def setUp(self):
+        compiler._FRAGMENT_CACHE.clear()
+        self.site = tempfile.mkdtemp()
+        # الجزء يكتب روابطه نسبة لملفه، ويضمن جزءاً آخر في مجلد فرعي
+        write(os.path.join(self.site, 'partials', 'nav.white'),
+              'image "logo.png"\nlink "Home" to "../index.html"\nlink "Docs" to "docs/"\n'
+              'include "icons/icon.white"\n')
+        write(os.path.join(self.site, 'partials', 'icons', 'icon.white'),
+              'image "star.png?v=2"\nlink "Site" to "https://example.com/"\n')
+
+    def compile(self, page, source, white=None):
+        white = white or compiler.WhiteCompiler()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return white.compile_to_html(source, os.path.join(self.site, os.path.dirname(page)))
+
+    def test_nested_partial_urls_are_relative_to_the_page(self):
+        html = self.compile('index.white', 'include "partials/nav.white"')
+        self.assertIn('src="partials/logo.png"', html)
+        self.assertIn('href="index.html"', html)
+        self.assertIn('href="partials/docs/"', html)
+        self.assertIn('src="partials/icons/star.png?v=2"', html)
+        self.assertIn('href="https://example.com/"', html)
+
+        # نفس الجزء من صفحة أعمق لا يُعاد من ذاكرة الصفحة السابقة
+        html = self.compile('blog/post.white', 'include "../partials/nav.white"')
+        self.assertIn('src="../partials/logo.png"', html)
+        self.assertIn('href="../index.html"', html)
+        self.assertIn('src="../partials/icons/star.png?v=2"', html)
+
+    def test_fragment_cache_depends_on_custom_directives(self):
+        write(os.path.join(self.site, 'partials', 'badge.white'), 'badge new\n')
+        outputs = []
+        for handler in (lambda compiler, line: '<b>first</b>', lambda compiler, line: '<b>second</b>'):
+            white = compiler.WhiteCompiler()
+            white.register_directive('badge', handler, render=True)
+            outputs.append(self.compile('index.white', 'include "partials/badge.white"', white))
+        self.assertIn('<b>first</b>', outputs[0])
+        self.assertIn('<b>second</b>', outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
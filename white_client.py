@@ -0,0 +1,106 @@
+"""عميل صغير لخادم الترجمة الدائم (python compiler.py daemon)
+
+لا يحمّل compiler.py فيبقى زمن التشغيل أقل ما يمكن لأدوات المحرر و pre-commit:
+
+    python white_client.py page.white other.white   كتابة page.html و other.html
+    python white_client.py --stdout page.white      طباعة HTML بدلاً من كتابته
+    python white_client.py - < page.white           ترجمة نص من stdin
+    python white_client.py --ping | --stop
+
+رمز الخروج 0 عند النجاح و 1 عند فشل ملف و 2 إذا لم يكن الخادم يعمل، حتى يمكن
+الرجوع إلى python compiler.py في هذه الحالة.
+"""
+import json
+import os
+import socket
+import sys
+
+USAGE = "usage: white_client.py [--socket PATH] [--minify] [--stdout] [--ping | --stop] [FILE | -]..."
+
+
+def default_socket_path() -> str:
+    """نفس المسار الافتراضي في compiler.default_socket_path"""
+    return os.environ.get('WHITE_SOCKET') or os.path.join(
+        os.environ.get('TMPDIR', '/tmp'), f"white-{os.getuid()}.sock")
+
+
+class DaemonClient:
+    """اتصال واحد بالخادم يرسل الطلبات بالتتابع على نفس الـ socket"""
+
+    def __init__(self, socket_path: str = None):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path or default_socket_path())
+        self.reader = self.socket.makefile('rb')
+
+    def request(self, **request) -> dict:
+        self.socket.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.reader.close()
+        self.socket.close()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path = None
+    flags = set()
+    targets = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--socket':
+            socket_path = next(args, None)
+        elif arg in ('--minify', '--stdout', '--ping', '--stop'):
+            flags.add(arg)
+        elif arg in ('-h', '--help') or (arg.startswith('--') and arg != '-'):
+            print(USAGE, file=sys.stderr)
+            return 0 if arg in ('-h', '--help') else 2
+        else:
+            targets.append(arg)
+
+    if not targets and not flags & {'--ping', '--stop'}:
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    try:
+        client = DaemonClient(socket_path)
+    except OSError as e:
+        print(f"daemon not running ({e}), start it with: python compiler.py daemon", file=sys.stderr)
+        return 2
+
+    failures = 0
+    try:
+        if '--ping' in flags:
+            print(json.dumps(client.request(op='ping')))
+        if '--stop' in flags:
+            client.request(op='shutdown')
+
+        minify = '--minify' in flags
+        for target in targets:
+            if target == '-':
+                response = client.request(source=sys.stdin.read(), base_dir=os.getcwd(), minify=minify)
+            else:
+                response = client.request(path=os.path.abspath(target), write='--stdout' not in flags,
+                                          minify=minify)
+
+            if not response.get('ok'):
+                failures += 1
+                print(f"error {target}: {response.get('error')}", file=sys.stderr)
+            elif 'html' in response:
+                sys.stdout.write(response['html'])
+            else:
+                print(f"{'created' if response['changed'] else 'unchanged'} {response['output']}")
+    except (OSError, ValueError) as e:
+        print(f"daemon error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        client.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())